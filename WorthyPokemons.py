@@ -1,190 +1,980 @@
 import requests
+import numpy as np
 import pandas as pd
 from tqdm import tqdm
 import time
 import json
 import os
 import argparse
+import asyncio
+import threading
+import sqlite3
+import mmap
+import gzip
+import struct
+from collections.abc import MutableMapping
+from concurrent.futures import Future, ThreadPoolExecutor
+from urllib.parse import urlparse
+from tqdm.asyncio import tqdm as async_tqdm
+from requests.adapters import HTTPAdapter
+
+try:
+    import aiohttp
+except ImportError:  # Optional: without it the asyncio backend runs requests in worker threads
+    aiohttp = None
+
+try:
+    import zstandard
+except ImportError:  # Optional: faster codec for compressed cache files, gzip is used without it
+    zstandard = None
+
+# Compressed cache files are named by codec suffix and hold one [key, value]
+# JSON line per entry, so they are encoded and decoded as streams
+COMPRESSION_SUFFIXES = {'gzip': '.gz', 'zstd': '.zst'}
+
+def is_compressed(filename):
+    return filename.endswith(tuple(COMPRESSION_SUFFIXES.values()))
+
+def open_compressed(filename, mode):
+    """Open a compressed file for streaming text I/O, picking the codec by suffix."""
+    if filename.endswith(COMPRESSION_SUFFIXES['zstd']):
+        return zstandard.open(filename, mode + 't', encoding='utf-8')
+    return gzip.open(filename, mode + 't', encoding='utf-8', compresslevel=6)
 
 # Pickle data to avoid repeated API calls
 def save_dictionary(data, filename):
-    with open(filename, 'w') as file:
+    # Write to a temporary file and rename it, so an interrupted save never leaves a truncated cache
+    temp_filename = f"{filename}.{os.getpid()}.tmp"
+    if is_compressed(filename):
+        with open_compressed(temp_filename + os.path.splitext(filename)[1], 'w') as file:
+            for key, value in data.items():
+                file.write(json.dumps([key, value]))
+                file.write('\n')
+        os.replace(temp_filename + os.path.splitext(filename)[1], filename)
+        return
+    with open(temp_filename, 'w') as file:
         json.dump(data, file)
+    os.replace(temp_filename, filename)
 
 def load_dictionary(filename):
     if os.path.exists(filename):
+        if is_compressed(filename):
+            with open_compressed(filename, 'r') as file:
+                return dict(json.loads(line) for line in file)
         with open(filename, 'r') as file:
             return json.load(file)
     return None
 
 # Cache file paths
 TYPE_CHART_FILENAME = 'type_chart.json'
+TYPE_MATRIX_CACHE = 'type_matrix.npz'
+TYPE_MEMBERS_FILENAME = 'type_members.json'
 POKEMON_DETAILS_CACHE = 'pokemon_details.json'
 SPECIES_INFO_CACHE = 'species_info.json'
+CACHE_VALIDATORS = 'cache_validators.json'
+NEGATIVE_CACHE = 'negative_cache.json'
+REFRESH_CHECKPOINT = 'refresh_checkpoint.json'
+SQLITE_CACHE = 'pokemon_cache.sqlite'
+FORM_INDEX = 'form_index.json'
+POKEMON_LISTING = 'pokemon_listing.json'
+ROSTER_SNAPSHOT = 'roster_snapshot.bin'
+REFRESH_CHECKPOINT_MAX_AGE = 24 * 3600  # Older interrupted refreshes start over
 
-def get_all_pokemon(limit=1025):
-    """Get a list of all Pokémon with their URLs."""
-    url = f"https://pokeapi.co/api/v2/pokemon?limit={limit}"
-    response = requests.get(url)
-    return response.json()['results']
+# Shared HTTP session settings
+HTTP_TIMEOUT = 30  # Seconds to wait for a connection or a response
+HTTP_POOL_SIZE = 10  # Keep-alive connections kept open per host
+HTTP_HEADERS = {'Accept-Encoding': 'gzip, deflate', 'User-Agent': 'WorthyPokemons'}
 
-def get_pokemon_details(url, details_cache, max_retries=3, retry_delay=1):
-    """Get detailed information for a specific Pokémon with caching and retry mechanism."""
-    # Check if this URL is in our cache
-    if url in details_cache:
-        return details_cache[url]
-        
-    for attempt in range(max_retries):
-        try:
-            response = requests.get(url)
-            if response.status_code == 200:
-                pokemon_data = response.json()
-                # Store in cache
-                details_cache[url] = pokemon_data
-                return pokemon_data
-            elif response.status_code == 429:  # Rate limit exceeded
-                retry_after = int(response.headers.get('Retry-After', retry_delay * 2))
+_session = None
+_session_lock = threading.Lock()
+
+def configure_session(pool_size=HTTP_POOL_SIZE, timeout=HTTP_TIMEOUT):
+    """Set the connection pool size and timeout used by every fetch function."""
+    global HTTP_POOL_SIZE, HTTP_TIMEOUT, _session
+    with _session_lock:
+        HTTP_POOL_SIZE = pool_size
+        HTTP_TIMEOUT = timeout
+        if _session is not None:
+            _session.close()
+            _session = None
+
+def get_session():
+    """Return the shared keep-alive session, creating it on first use."""
+    global _session
+    with _session_lock:
+        if _session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=HTTP_POOL_SIZE, pool_maxsize=HTTP_POOL_SIZE)
+            session.mount('https://', adapter)
+            session.mount('http://', adapter)
+            session.headers.update(HTTP_HEADERS)
+            _session = session
+        return _session
+
+class RateLimiter:
+    """Token bucket shared by every fetch worker.
+
+    Only real network requests take a token, so cached lookups never wait.
+    A 429 pauses all workers for the Retry-After period and halves the rate;
+    each successful response raises it again towards the configured maximum.
+    """
+
+    def __init__(self, rate=10.0, burst=10, min_rate=0.5):
+        self.max_rate = rate
+        self.rate = rate
+        self.burst = burst
+        self.min_rate = min(min_rate, rate)
+        self.tokens = burst
+        self.updated = time.monotonic()
+        self.paused_until = 0
+        self.lock = threading.Lock()
+
+    def reserve(self):
+        """Take a token if one is available, otherwise return the seconds to wait before trying again."""
+        with self.lock:
+            now = time.monotonic()
+            if now < self.paused_until:
+                return self.paused_until - now
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return 0
+            return (1 - self.tokens) / self.rate
+
+    def acquire(self):
+        """Block until a request may be sent."""
+        wait = self.reserve()
+        while wait > 0:
+            time.sleep(wait)
+            wait = self.reserve()
+
+    def backoff(self, retry_after):
+        """Pause every worker for retry_after seconds and halve the request rate."""
+        with self.lock:
+            resume_at = time.monotonic() + retry_after
+            if resume_at > self.paused_until:
                 print(f"Rate limit hit. Waiting for {retry_after} seconds...")
-                time.sleep(retry_after)
-            else:
-                time.sleep(retry_delay)
-        except (json.JSONDecodeError, requests.RequestException) as e:
-            if attempt < max_retries - 1:
-                time.sleep(retry_delay)
+                self.paused_until = resume_at
+            self.rate = max(self.min_rate, self.rate / 2)
+            self.tokens = 1  # Let exactly one request through once the pause ends
+            self.updated = self.paused_until
+
+    def success(self):
+        """Recover the request rate after a successful response."""
+        with self.lock:
+            self.rate = min(self.max_rate, self.rate + self.max_rate / 20)
+
+rate_limiter = RateLimiter()
+
+def configure_rate_limit(rate, burst):
+    """Replace the shared rate limiter with one allowing rate requests/sec and bursts of burst."""
+    global rate_limiter
+    rate_limiter = RateLimiter(rate=rate, burst=burst)
+
+def get_retry_after(headers, default):
+    """Read a Retry-After header in seconds, falling back to default if it is missing or a date."""
+    try:
+        return max(0, int(headers.get('Retry-After', default)))
+    except ValueError:
+        return default
+
+def record_response(status_code, headers, retry_delay=1):
+    """Feed a response status back into the shared rate limiter."""
+    if status_code == 429:
+        rate_limiter.backoff(get_retry_after(headers, retry_delay * 2))
+    elif status_code < 500:
+        rate_limiter.success()
+
+# Offline mode: every resource must come from the caches. Resources that aren't
+# cached are collected and reported together instead of being fetched
+offline = False  # Set by --offline
+missing_resources = set()  # Keys of resources an offline run needed but didn't have
+
+def report_missing_resources():
+    """Print every resource an offline run couldn't find in the caches and stop with an error."""
+    print(f"\nOffline mode: {len(missing_resources)} resources are not cached:")
+    for key in sorted(missing_resources):
+        print(f"  {key}")
+    raise SystemExit(1)
+
+def http_get(url, **kwargs):
+    """GET a URL through the shared session, rate limiter and configured timeout."""
+    if offline:
+        # Offline runs are served from the caches, so reaching this is a bug, not a cache miss
+        raise Exception(f"Network request in offline mode: {url}")
+    kwargs.setdefault('timeout', HTTP_TIMEOUT)
+    rate_limiter.acquire()
+    response = get_session().get(url, **kwargs)
+    record_response(response.status_code, response.headers)
+    return response
+
+# Pokémon listing: fetched page by page and cached; an expired cached listing
+# is reused if the API still reports the same number of Pokémon
+LISTING_URL = "https://pokeapi.co/api/v2/pokemon"
+LISTING_PAGE_SIZE = 500
+POKEMON_LISTING_TTL = 24 * 3600  # Seconds before the listing count is checked again
+
+def configure_listing_cache(ttl_hours):
+    global POKEMON_LISTING_TTL
+    POKEMON_LISTING_TTL = ttl_hours * 3600
+
+def iter_listing_pages(url):
+    """Yield the count and results of each page of a paginated listing, following its 'next' links."""
+    while url:
+        data = fetch_json(url)  # Retries rate-limited and failed pages like every other request
+        if data is None:
+            raise Exception(f"Failed to get the Pokémon listing page {url}")
+        yield data['count'], data['results']
+        url = data['next']
+
+def register_listing_aliases(results):
+    # The listing maps every name to its ID, so name-based lookups can share the ID-keyed cache entry
+    for pokemon in results:
+        resource_aliases[f"pokemon/{pokemon['name']}"] = get_resource_key(pokemon['url'])
+
+def is_listing_fresh():
+    """Check whether the cached listing is recent enough to use without checking the API count."""
+    cached = load_dictionary(POKEMON_LISTING)
+    return cached is not None and time.time() - cached['timestamp'] <= POKEMON_LISTING_TTL
+
+def iter_all_pokemon(page_size=LISTING_PAGE_SIZE, refresh=False):
+    """Yield every listed Pokémon with its URL, from the cached listing or page by page as pages arrive."""
+    cached = None if refresh else load_dictionary(POKEMON_LISTING)
+    if offline and cached is None:
+        missing_resources.add(get_resource_key(LISTING_URL))
+        return
+    if cached is not None and not offline and time.time() - cached['timestamp'] > POKEMON_LISTING_TTL:
+        # A one-entry page is enough to read the current count
+        count, _ = next(iter_listing_pages(f"{LISTING_URL}?limit=1"))
+        if count == cached['count']:
+            cached['timestamp'] = time.time()
+            save_dictionary(cached, POKEMON_LISTING)
+        else:
+            print(f"The API lists {count} Pokémons instead of {cached['count']}, fetching the listing again.")
+            cached = None
+    if cached is not None:
+        register_listing_aliases(cached['results'])
+        yield from cached['results']
+        return
+
+    results = []
+    for count, page in iter_listing_pages(f"{LISTING_URL}?limit={page_size}"):
+        register_listing_aliases(page)
+        results.extend(page)
+        yield from page
+    save_dictionary({'timestamp': time.time(), 'count': count, 'results': results}, POKEMON_LISTING)
+
+# Canonical resource keys: every cache is keyed like 'pokemon/25' so name- and
+# ID-based URLs for the same resource share a single stored payload
+resource_aliases = {}  # 'pokemon/pikachu' -> 'pokemon/25'
+_in_flight = {}  # Resource key -> Future shared by concurrent requests for it
+_in_flight_lock = threading.Lock()
+
+def get_resource_key(url):
+    """Build the canonical key for a resource URL, e.g. 'pokemon/25' for .../api/v2/pokemon/25/."""
+    parts = [part for part in urlparse(url).path.lower().split('/') if part]
+    if 'v2' in parts:
+        parts = parts[parts.index('v2') + 1:]
+    return '/'.join(parts)
+
+def resolve_resource_key(url):
+    """Canonical key for a URL, following name -> ID aliases."""
+    key = get_resource_key(url)
+    return resource_aliases.get(key, key)
+
+# Field projection: only the fields the analysis reads are stored, unless --full-payloads is set.
+# Moves, sprites, game indices and flavor text make up nearly all of each raw payload.
+PROJECTED_FIELDS = {
+    'pokemon': ('id', 'name', 'is_default', 'types', 'stats', 'species'),
+    'pokemon-species': ('id', 'name', 'is_legendary', 'is_mythical', 'varieties'),
+}
+keep_full_payloads = False
+
+def project_payload(kind, data):
+    """Drop the fields of a payload that the analysis doesn't use."""
+    fields = PROJECTED_FIELDS.get(kind)
+    if keep_full_payloads or fields is None:
+        return data
+    return {field: data[field] for field in fields if field in data}
+
+def store_resource(cache, key, data):
+    """Store a payload under its ID-based key and alias its name to it."""
+    kind = key.split('/')[0]
+    data = project_payload(kind, data)
+    if isinstance(data, dict) and 'id' in data:
+        id_key = f"{kind}/{data['id']}"
+        if 'name' in data:
+            resource_aliases[f"{kind}/{data['name']}"] = id_key
+        if key != id_key:
+            resource_aliases[key] = id_key
+            if key in cache_validators:
+                cache_validators[id_key] = cache_validators.pop(key)
+        key = id_key
+    cache[key] = data
+    return key
+
+def canonicalize_cache(cache, kind):
+    """Re-key a cache loaded from disk by canonical key, merging duplicate entries.
+
+    Older cache files are keyed by full URL (details) or bare ID (species),
+    may hold placeholder entries for failed species lookups, which are
+    dropped, and may hold full payloads, which are projected. Returns the
+    canonical cache and whether it differs from what was loaded.
+    """
+    canonical = {}
+    changed = False
+    for key, data in cache.items():
+        if 'id' not in data:
+            changed = True
+            continue
+        key = get_resource_key(key) if '/' in key else f"{kind}/{key}"
+        stored_key = store_resource(canonical, key, data)
+        changed = changed or stored_key != key or len(canonical[stored_key]) != len(data)
+    return canonical, changed
+
+# Cache storage backends. Both behave like a dict keyed by resource key, count
+# their writes for checkpointing and persist pending writes on flush().
+class JSONCacheStore(dict):
+    """Cache held in memory and saved as a single JSON file, optionally compressed.
+
+    If the file only exists with another compression (or none), it is loaded
+    from there and replaced by the requested format on the first flush.
+    """
+
+    def __init__(self, filename, kind, compression='none'):
+        self.filename = filename + COMPRESSION_SUFFIXES.get(compression, '')
+        candidates = [filename, filename + COMPRESSION_SUFFIXES['gzip']]
+        if zstandard is not None:
+            candidates.append(filename + COMPRESSION_SUFFIXES['zstd'])
+        candidates.sort(key=lambda name: name != self.filename)
+        self.source = next((name for name in candidates if os.path.exists(name)), self.filename)
+        data, self.migrated = canonicalize_cache(load_dictionary(self.source) or {}, kind)
+        super().__init__(data)
+        self.migrated = self.migrated or self.source != self.filename
+        self.writes = 0
+        self.flushed_writes = 0
+
+    def __setitem__(self, key, value):
+        super().__setitem__(key, value)
+        self.writes += 1
+
+    def flush(self):
+        if self.writes == self.flushed_writes and not self.migrated:
+            return
+        writes = self.writes
+        # Copy first: other workers may be adding entries while the file is written
+        save_dictionary(dict(self), self.filename)
+        if self.source != self.filename and os.path.exists(self.source):
+            os.remove(self.source)  # Converted to the requested compression
+        self.source = self.filename
+        self.flushed_writes = writes
+        self.migrated = False
+
+_sqlite_connections = {}  # Filename -> (connection, lock)
+
+def get_sqlite_connection(filename):
+    """Open (once per process) a connection to an SQLite cache file, with a lock serialising its use."""
+    if filename not in _sqlite_connections:
+        connection = sqlite3.connect(filename, timeout=30, check_same_thread=False)
+        connection.execute('PRAGMA journal_mode=WAL')
+        connection.execute('PRAGMA synchronous=NORMAL')  # Per-write commits skip the fsync; WAL keeps the file consistent
+        _sqlite_connections[filename] = (connection, threading.Lock())
+    return _sqlite_connections[filename]
+
+class SQLiteCacheStore(MutableMapping):
+    """Cache stored in an SQLite table and read or written one entry at a time.
+
+    Only the entries a run asks for are decoded. Every write is committed
+    right away, so the write lock is only held for one statement and several
+    processes can share the cache; WAL mode lets them read while a run is
+    updating it. An existing JSON cache file is imported the first time the
+    table is created.
+    """
+
+    def __init__(self, filename, table, kind, import_from=None):
+        self.table = table
+        self.migrated = False
+        self.writes = 0
+        # Tables in one file share a connection: a second connection couldn't write while this one holds a transaction
+        self.connection, self.lock = get_sqlite_connection(filename)
+        with self.lock:
+            self.connection.execute(f'CREATE TABLE IF NOT EXISTS {table} (key TEXT PRIMARY KEY, value TEXT NOT NULL)')
+            self.connection.commit()
+        if import_from and len(self) == 0 and os.path.exists(import_from):
+            data, _ = canonicalize_cache(load_dictionary(import_from), kind)
+            with self.lock:
+                self.connection.executemany(f'INSERT OR REPLACE INTO {table} VALUES (?, ?)',
+                                            ((key, json.dumps(value)) for key, value in data.items()))
+                self.connection.commit()
+
+    def _query(self, sql, params=()):
+        with self.lock:
+            return self.connection.execute(sql, params).fetchall()
+
+    def _write(self, sql, params=()):
+        with self.lock:
+            self.connection.execute(sql, params)
+            self.connection.commit()
+        self.writes += 1
+
+    def __getitem__(self, key):
+        rows = self._query(f'SELECT value FROM {self.table} WHERE key = ?', (key,))
+        if not rows:
+            raise KeyError(key)
+        return json.loads(rows[0][0])
+
+    def __contains__(self, key):
+        return bool(self._query(f'SELECT 1 FROM {self.table} WHERE key = ?', (key,)))
+
+    def __setitem__(self, key, value):
+        self._write(f'INSERT OR REPLACE INTO {self.table} VALUES (?, ?)', (key, json.dumps(value)))
+
+    def __delitem__(self, key):
+        if key not in self:
+            raise KeyError(key)
+        self._write(f'DELETE FROM {self.table} WHERE key = ?', (key,))
+
+    def __iter__(self):
+        return iter([row[0] for row in self._query(f'SELECT key FROM {self.table}')])
+
+    def __len__(self):
+        return self._query(f'SELECT COUNT(*) FROM {self.table}')[0][0]
+
+    def flush(self):
+        pass  # Already committed by every write
+
+MMAP_COMPACT_RATIO = 0.5  # Share of dead bytes in an mmap data file that triggers compaction
+
+class MmapCacheStore(MutableMapping):
+    """Cache stored as an append-only data file plus a JSON offset index.
+
+    The data file is memory-mapped and an entry is decoded only when it is
+    looked up, so a run that needs a few entries never parses the rest. New
+    entries are held in memory and appended on flush(); the index is rewritten
+    atomically afterwards, so a crash mid-append only leaves unindexed bytes.
+    Rewritten entries leave their old bytes behind, so once more than
+    MMAP_COMPACT_RATIO of the data file is dead, flush() rewrites it with the
+    live entries only. An existing JSON cache file is imported on first use.
+    """
+
+    def __init__(self, filename, kind, import_from=None):
+        base_filename = os.path.splitext(filename)[0]
+        self.data_filename = f"{base_filename}.dat"
+        self.index_filename = f"{base_filename}.idx"
+        self._finish_compaction()
+        self.migrated = False
+        self.writes = 0
+        self.flushed_writes = 0
+        self.lock = threading.Lock()
+        self.pending = {}  # Entries written since the last flush
+        self.index = load_dictionary(self.index_filename)  # Key -> [offset, length] in the data file
+        if self.index is None:
+            self.index = {}
+            if import_from and os.path.exists(import_from):
+                self.pending, _ = canonicalize_cache(load_dictionary(import_from), kind)
+                self.migrated = True
+        self.mapped = None
+        self._map()
+
+    def _finish_compaction(self):
+        # The compacted index is written last, so if it exists the compacted data is complete: roll forward
+        if os.path.exists(f"{self.index_filename}.compact"):
+            if os.path.exists(f"{self.data_filename}.compact"):
+                os.replace(f"{self.data_filename}.compact", self.data_filename)
+            os.replace(f"{self.index_filename}.compact", self.index_filename)
+        elif os.path.exists(f"{self.data_filename}.compact"):
+            os.remove(f"{self.data_filename}.compact")
+
+    def _compact(self):
+        # Copy the live entries to a new data file, then swap the data and index files in
+        with open(self.data_filename, 'rb') as file:
+            data = file.read()
+        index = {}
+        offset = 0
+        with open(f"{self.data_filename}.compact", 'wb') as file:
+            for key, (old_offset, length) in self.index.items():
+                file.write(data[old_offset:old_offset + length] + b'\n')
+                index[key] = [offset, length]
+                offset += length + 1
+            file.flush()
+            os.fsync(file.fileno())
+        save_dictionary(index, f"{self.index_filename}.compact")
+        self.index = index
+        self._finish_compaction()
+
+    def _map(self):
+        if self.mapped is not None:
+            self.mapped.close()
+            self.mapped = None
+        if os.path.exists(self.data_filename) and os.path.getsize(self.data_filename):
+            with open(self.data_filename, 'rb') as file:
+                self.mapped = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def __getitem__(self, key):
+        with self.lock:
+            if key in self.pending:
+                return self.pending[key]
+            offset, length = self.index[key]
+            return json.loads(self.mapped[offset:offset + length])
+
+    def __contains__(self, key):
+        return key in self.pending or key in self.index
+
+    def __setitem__(self, key, value):
+        with self.lock:
+            self.pending[key] = value
+            self.writes += 1
+
+    def __delitem__(self, key):
+        with self.lock:
+            found = self.pending.pop(key, None) is not None
+            found = self.index.pop(key, None) is not None or found
+            if not found:
+                raise KeyError(key)
+            self.writes += 1
+
+    def __iter__(self):
+        return iter(list(dict.fromkeys([*self.index, *self.pending])))
+
+    def __len__(self):
+        return len(self.index) + sum(1 for key in self.pending if key not in self.index)
+
+    def flush(self):
+        with self.lock:
+            if self.writes == self.flushed_writes and not self.migrated:
+                return
+            with open(self.data_filename, 'ab') as file:
+                offset = file.seek(0, os.SEEK_END)
+                for key, value in self.pending.items():
+                    encoded = json.dumps(value).encode()
+                    file.write(encoded + b'\n')
+                    self.index[key] = [offset, len(encoded)]
+                    offset += len(encoded) + 1
+                file.flush()
+                os.fsync(file.fileno())
+            live_size = sum(length + 1 for _, length in self.index.values())
+            if offset - live_size > MMAP_COMPACT_RATIO * offset:
+                if self.mapped is not None:
+                    self.mapped.close()  # Release the old data file before it is replaced
+                    self.mapped = None
+                self._compact()
             else:
-                raise Exception(f"Failed to get data after {max_retries} attempts: {str(e)}")
-    return None
+                save_dictionary(self.index, self.index_filename)
+            self.pending = {}
+            self.flushed_writes = self.writes
+            self.migrated = False
+            self._map()
 
-def get_species_info(pokemon_id, species_cache, max_retries=3, retry_delay=1):
-    """Get species information with caching and retry mechanism."""
-    # Check if this ID is in our cache
-    if pokemon_id in species_cache:
-        return species_cache[pokemon_id]
-    
-    url = f"https://pokeapi.co/api/v2/pokemon-species/{pokemon_id}/"
-    
+def open_cache(filename, kind, backend='json', compression='none'):
+    """Open a resource cache with the chosen storage backend ('json', 'sqlite' or 'mmap').
+
+    compression ('none', 'gzip' or 'zstd') applies to the json backend.
+    """
+    if backend == 'sqlite':
+        table = os.path.splitext(os.path.basename(filename))[0]
+        return SQLiteCacheStore(SQLITE_CACHE, table, kind, import_from=filename)
+    if backend == 'mmap':
+        return MmapCacheStore(filename, kind, import_from=filename)
+    return JSONCacheStore(filename, kind, compression)
+
+# Conditional revalidation: validators from each 200 response are kept so a
+# refresh can ask the API whether a cached resource changed instead of re-downloading it
+NOT_MODIFIED = object()  # Returned by fetch_json when the server answers 304
+cache_validators = {}  # Resource key -> {'etag': ..., 'last_modified': ...}
+revalidate_cache = False  # Set by --refresh-cache
+revalidated_keys = set()  # Resource keys already confirmed fresh during this run
+
+def is_cache_fresh(key):
+    """Check whether a cached entry can be used without asking the API."""
+    return not revalidate_cache or key in revalidated_keys
+
+def get_conditional_headers(url):
+    """Build If-None-Match / If-Modified-Since headers from the validators saved for a URL."""
+    validators = cache_validators.get(resolve_resource_key(url), {})
+    headers = {}
+    if validators.get('etag'):
+        headers['If-None-Match'] = validators['etag']
+    if validators.get('last_modified'):
+        headers['If-Modified-Since'] = validators['last_modified']
+    return headers
+
+def remember_validators(url, headers):
+    """Store the ETag / Last-Modified validators of a fresh response."""
+    key = resolve_resource_key(url)
+    validators = {'etag': headers.get('ETag'), 'last_modified': headers.get('Last-Modified')}
+    if validators['etag'] or validators['last_modified']:
+        cache_validators[key] = validators
+    revalidated_keys.add(key)
+
+# Negative cache: resources the API permanently refused (404 etc.) are remembered
+# with a reason and timestamp so later runs don't request them again until the TTL passes
+negative_cache = {}  # Resource key -> {'reason': ..., 'status': ..., 'timestamp': ...}
+NEGATIVE_CACHE_TTL = 7 * 24 * 3600  # Seconds before a known-missing resource is tried again
+run_started = time.time()  # Negative cache entries newer than this were recorded by this run
+
+def configure_negative_cache(ttl_hours):
+    """Set how long known-missing resources are skipped before being requested again."""
+    global NEGATIVE_CACHE_TTL
+    NEGATIVE_CACHE_TTL = ttl_hours * 3600
+
+def is_permanent_failure(status_code):
+    """Check whether an error status will not change by retrying (404, 410, ...)."""
+    return 400 <= status_code < 500 and status_code not in (408, 429)
+
+def remember_failure(url, status_code, reason):
+    """Record a permanently failed resource in the negative cache."""
+    negative_cache[resolve_resource_key(url)] = {'reason': reason, 'status': status_code, 'timestamp': time.time()}
+
+def is_known_missing(key):
+    """Check whether a resource is in the negative cache and its entry hasn't expired.
+
+    --refresh-cache retries entries recorded by earlier runs, but not failures recorded during this one.
+    """
+    entry = negative_cache.get(key)
+    if entry is None or (revalidate_cache and entry['timestamp'] < run_started):
+        return False
+    return time.time() - entry['timestamp'] < NEGATIVE_CACHE_TTL
+
+def prune_negative_cache(entries):
+    """Drop expired entries from a negative cache loaded from disk."""
+    now = time.time()
+    return {key: entry for key, entry in entries.items() if now - entry['timestamp'] < NEGATIVE_CACHE_TTL}
+
+# Sentinels returned by handle_response when a request has to be sent again
+RETRY = object()  # After retry_delay
+RETRY_NOW = object()  # Right away; the shared rate limiter holds it until Retry-After passes
+
+def handle_response(url, status, headers, data):
+    """Turn one response into the result of fetch_json, or RETRY / RETRY_NOW.
+
+    data is the decoded body of a 200 response. Both fetch backends call this,
+    so validators, 304s and the negative cache are handled in one place.
+    """
+    if status == 200:
+        remember_validators(url, headers)
+        return data
+    elif status == 304:
+        revalidated_keys.add(resolve_resource_key(url))
+        return NOT_MODIFIED
+    elif status == 429:  # Rate limit exceeded
+        return RETRY_NOW
+    elif is_permanent_failure(status):
+        remember_failure(url, status, f"HTTP {status}")
+        return None
+    return RETRY
+
+def fetch_json(url, max_retries=3, retry_delay=1, conditional=False):
+    """Fetch a JSON resource with a retry mechanism.
+
+    With conditional=True the saved validators are sent and NOT_MODIFIED is
+    returned on a 304. Returns None if all attempts fail; permanent failures
+    are recorded in the negative cache without further retries.
+    """
     for attempt in range(max_retries):
         try:
-            response = requests.get(url)
-            if response.status_code == 200:
-                species_data = response.json()
-                # Store in cache
-                species_cache[pokemon_id] = species_data
-                return species_data
-            elif response.status_code == 404:
-                # Some special forms don't have their own species entry
-                # In this case, try to get the base form's ID
-                base_id = str(pokemon_id).split('-')[0]
-                if base_id.isdigit():
-                    url = f"https://pokeapi.co/api/v2/pokemon-species/{base_id}/"
-                    continue
-                else:
-                    default_data = {"is_legendary": False, "is_mythical": False}
-                    species_cache[pokemon_id] = default_data
-                    return default_data
-            elif response.status_code == 429:  # Rate limit exceeded
-                retry_after = int(response.headers.get('Retry-After', retry_delay * 2))
-                print(f"Rate limit hit. Waiting for {retry_after} seconds...")
-                time.sleep(retry_after)
-            else:
+            response = http_get(url, headers=get_conditional_headers(url) if conditional else None)
+            data = response.json() if response.status_code == 200 else None
+            result = handle_response(url, response.status_code, response.headers, data)
+            if result is RETRY:
                 time.sleep(retry_delay)
+            elif result is not RETRY_NOW:
+                return result
         except (json.JSONDecodeError, requests.RequestException) as e:
             if attempt < max_retries - 1:
                 time.sleep(retry_delay)
             else:
-                raise Exception(f"Failed to get species data after {max_retries} attempts: {str(e)}")
-    
-    default_data = {"is_legendary": False, "is_mythical": False}
-    species_cache[pokemon_id] = default_data
-    return default_data  # Default if all attempts fail
-
-def get_type_effectiveness(type_name):
-    """Get damage relationships for a specific type."""
-    url = f"https://pokeapi.co/api/v2/type/{type_name}/"
-    response = requests.get(url)
-    return response.json()['damage_relations']
-
-def calculate_defensive_effectiveness(pokemon_types, type_chart):
-    """Calculate how many types a Pokémon resists or is immune to."""
-    immunities = set()
-    quarter_damage = set()
-    half_damage = set()
-    
-    for poke_type in pokemon_types:
-        relations = type_chart[poke_type]
-        
-        # No damage (immunities)
-        for immunity in relations['no_damage_from']:
-            # Extract the type name instead of using the whole dict
-            immunity_type = immunity['name']
-            immunities.add(immunity_type)
-        
-        # Half damage
-        for resistance in relations['half_damage_from']:
-            # Extract the type name
-            resistance_type = resistance['name']
-            if resistance_type in immunities:
-                continue
-            elif resistance_type in quarter_damage:
-                continue
-            elif resistance_type in half_damage:
-                quarter_damage.add(resistance_type)
-                half_damage.remove(resistance_type)
-            else:
-                half_damage.add(resistance_type)
-    
-    return len(immunities) + len(quarter_damage) + len(half_damage)
-
-def is_special_form(pokemon_name):
-    """Check if a Pokémon is a special form (mega, regional, etc.)."""
-    # Forms that contain a hyphen but aren't considered "alternate" forms
-    exceptions = ['kommo-o', 'hakamo-o', 'jangmo-o', 'type-null', 'ho-oh', 'porygon-z']
-    if '-' in pokemon_name and pokemon_name not in exceptions:
-        return True
-    return False
-
-def is_gmax_or_gender_form(pokemon_name):
-    """Check if form is Gigantamax or gender-specific variant."""
-    gmax_indicators = ['gmax-', 'gigantamax-']
-    gender_indicators = ['-male', '-female']
-    
-    for indicator in gmax_indicators + gender_indicators:
-        if indicator in pokemon_name.lower():
-            return True
-    return False
-
-def format_pokemon_name(pokemon_name):
-    """Format Pokémon names with special forms to be more readable."""
-    exceptions = ['kommo-o', 'hakamo-o', 'jangmo-o', 'type-null', 'ho-oh', 'porygon-z']
-    if pokemon_name.lower() in exceptions:
-        return pokemon_name.title()
-        
-    if '-' not in pokemon_name:
-        return pokemon_name.title()
-    
-    parts = pokemon_name.split('-')
-    base_name = parts[0].title()
-    form_name = '-'.join(parts[1:])
-    
-    # Standard form prefixes that should go before the name
-    prefix_forms = {
-        'mega': 'Mega',
-        'alolan': 'Alolan',
-        'galarian': 'Galarian',
-        'hisuian': 'Hisuian',
-        'paldean': 'Paldean',
-        'primal': 'Primal'
+                raise Exception(f"Failed to get data after {max_retries} attempts: {str(e)}")
+    return None
+
+FETCH = object()  # Returned by lookup_resource when a resource has to be requested
+
+def lookup_resource(key, cache):
+    """Answer a resource lookup without a request, or return FETCH.
+
+    Fresh cached entries are returned as-is; known-missing resources, and
+    uncached ones in offline mode (recorded as missing), give None.
+    """
+    if key in cache and is_cache_fresh(key):
+        return cache[key]
+    if is_known_missing(key):
+        return None
+    if offline:
+        missing_resources.add(key)
+        return None
+    return FETCH
+
+def store_fetched_resource(cache, key, data):
+    """Store a fetch_json result in the cache and return the resource (the cached copy on a 304).
+
+    A failed revalidation that isn't permanent also returns the cached copy,
+    which stays unrevalidated, so the next request tries again.
+    """
+    if data is NOT_MODIFIED or (data is None and key in cache and not is_known_missing(key)):
+        return cache[key]
+    if data is not None:
+        store_resource(cache, key, data)
+    return data
+
+def get_cached_resource(url, cache, max_retries=3, retry_delay=1):
+    """Get a resource through a cache keyed by canonical resource key.
+
+    Concurrent calls for the same resource wait for a single request instead of
+    each fetching it. Returns None for resources in the negative cache.
+    """
+    key = resolve_resource_key(url)
+    data = lookup_resource(key, cache)
+    if data is not FETCH:
+        return data
+
+    with _in_flight_lock:
+        future = _in_flight.get(key)
+        is_owner = future is None
+        if is_owner:
+            future = _in_flight[key] = Future()
+    if not is_owner:
+        return future.result()
+
+    try:
+        data = store_fetched_resource(cache, key, fetch_json(url, max_retries, retry_delay, conditional=key in cache))
+        future.set_result(data)
+        return data
+    except BaseException as e:
+        future.set_exception(e)
+        raise
+    finally:
+        with _in_flight_lock:
+            del _in_flight[key]
+
+def get_pokemon_details(url, details_cache, max_retries=3, retry_delay=1):
+    """Get detailed information for a specific Pokémon with caching and retry mechanism."""
+    return get_cached_resource(url, details_cache, max_retries, retry_delay)
+
+def get_resource_id(url):
+    """Extract the trailing ID from a PokéAPI resource URL."""
+    return int(url.rstrip('/').rsplit('/', 1)[-1])
+
+def get_species_url(species_id):
+    """Build the species URL for a species ID."""
+    return f"https://pokeapi.co/api/v2/pokemon-species/{species_id}/"
+
+def get_species_info(species, species_cache, max_retries=3, retry_delay=1):
+    """Get species information with caching and retry mechanism.
+
+    species is the species URL embedded in the Pokémon data (or a species ID).
+    Forms don't have species entries of their own, so never pass a /pokemon ID.
+    Returns None if the species could not be fetched.
+    """
+    url = species if isinstance(species, str) else get_species_url(species)
+    return get_cached_resource(url, species_cache, max_retries, retry_delay)
+
+def get_type_effectiveness(type_name, cached_relations=None, type_members=None):
+    """Get damage relationships for a specific type, revalidating cached_relations if given.
+
+    If type_members is given, the Pokémon of the type listed in the same
+    response are stored in it as [name, slot] pairs (kept as-is on a 304).
+    """
+    type_data = fetch_json(get_type_url(type_name), conditional=cached_relations is not None)
+    return read_type_relations(type_name, type_data, cached_relations, type_members)
+
+TYPE_LIST_URL = "https://pokeapi.co/api/v2/type"
+
+def get_type_url(type_name):
+    """Build the URL of a type resource."""
+    return f"https://pokeapi.co/api/v2/type/{type_name}/"
+
+def read_type_relations(type_name, type_data, cached_relations, type_members):
+    """Extract the damage relations (and members) from a fetch_json result for a type."""
+    if type_data is NOT_MODIFIED:
+        return cached_relations
+    if type_data is None:
+        raise Exception(f"Failed to get type data for {type_name}")
+    if type_members is not None:
+        type_members[type_name] = [[member['pokemon']['name'], member['slot']] for member in type_data['pokemon']]
+    return type_data['damage_relations']
+
+def get_pokemon_types(type_members):
+    """Map every Pokémon name to its types, in slot order, from the type membership lists."""
+    slots = {}
+    for type_name, members in type_members.items():
+        for pokemon_name, slot in members:
+            slots.setdefault(pokemon_name, {})[slot] = type_name
+    return {pokemon_name: [types[slot] for slot in sorted(types)] for pokemon_name, types in slots.items()}
+
+def check_type_filter(types, known_types):
+    """Stop with an error if --types names a type that isn't in the type chart."""
+    unknown = sorted(set(types or []) - set(known_types))
+    if unknown:
+        raise SystemExit(f"Unknown types for --types: {', '.join(unknown)}")
+
+# Type effectiveness matrix: the type chart compiled to multipliers indexed
+# [attacking type code, defending type code], so scoring is array arithmetic
+MATRIX_EXCLUDED_TYPES = ['stellar']  # Tera-only type, never one of a Pokémon's own types
+
+def build_type_matrix(type_chart):
+    """Compile the type chart into its type names and a dense multiplier matrix."""
+    type_names = [type_name for type_name in type_chart if type_name not in MATRIX_EXCLUDED_TYPES]
+    type_codes = {type_name: code for code, type_name in enumerate(type_names)}
+    matrix = np.ones((len(type_names), len(type_names)))
+    relations = [('double_damage_from', 2.0), ('half_damage_from', 0.5), ('no_damage_from', 0.0)]
+    for defending in type_names:
+        for relation, multiplier in relations:
+            for attacking in type_chart[defending][relation]:
+                if attacking['name'] in type_codes:
+                    matrix[type_codes[attacking['name']], type_codes[defending]] = multiplier
+    return type_names, matrix
+
+def load_type_matrix(type_chart=None):
+    """Load the compiled type matrix, rebuilding it if type_chart.json changed since it was compiled."""
+    chart_stat = os.stat(TYPE_CHART_FILENAME)
+    source = np.array([chart_stat.st_size, chart_stat.st_mtime_ns], dtype=np.int64)
+    if os.path.exists(TYPE_MATRIX_CACHE):
+        with np.load(TYPE_MATRIX_CACHE) as cached:
+            if np.array_equal(cached['source'], source):
+                return cached['type_names'].tolist(), cached['matrix']
+    type_names, matrix = build_type_matrix(type_chart or load_dictionary(TYPE_CHART_FILENAME))
+    temp_filename = f"{TYPE_MATRIX_CACHE}.{os.getpid()}.tmp"
+    with open(temp_filename, 'wb') as file:
+        np.savez(file, source=source, type_names=np.array(type_names), matrix=matrix)
+    os.replace(temp_filename, TYPE_MATRIX_CACHE)
+    return type_names, matrix
+
+def calculate_defensive_effectiveness(type_codes, type_matrix):
+    """Calculate how many types each Pokémon resists or is immune to.
+
+    type_codes has one row of two type codes per Pokémon, -1 for no second type.
+    """
+    first = type_matrix[:, type_codes[:, 0]].T
+    second = np.where(type_codes[:, 1:] >= 0, type_matrix[:, type_codes[:, 1]].T, 1.0)
+    immunities = (first == 0) | (second == 0)
+    # A resistance of the first type still counts when the second type is immune, as it always has
+    resistances = (first == 0.5) | ((second == 0.5) & ~immunities)
+    return immunities.sum(axis=1) + resistances.sum(axis=1)
+
+def build_typing_table(type_names, type_matrix):
+    """Tabulate the defensive profile of every single and dual typing (171 for 18 types).
+
+    Returns the table and an index array mapping two type codes, in either
+    order, to the table row of their typing.
+    """
+    first, second = np.triu_indices(len(type_names))  # A typing with first == second is a single type
+    single = first == second
+    profiles = np.where(single, type_matrix[:, first], type_matrix[:, first] * type_matrix[:, second]).T
+    table = pd.DataFrame({
+        'type1': [type_names[code] for code in first],
+        'type2': np.where(single, '', np.array(type_names)[second]),
+    })
+    for code, type_name in enumerate(type_names):
+        table[f'from_{type_name}'] = profiles[:, code]
+    metrics = [('immunities', 0), ('resistances_4x', 0.25), ('resistances_2x', 0.5),
+               ('weaknesses_2x', 2), ('weaknesses_4x', 4)]
+    for column, multiplier in metrics:
+        table[column] = (profiles == multiplier).sum(axis=1)
+    # The original count depends on which type is listed first, so it is kept for both orders
+    no_type = np.full_like(first, -1)
+    table['defensive_advantages'] = calculate_defensive_effectiveness(
+        np.column_stack([first, np.where(single, no_type, second)]), type_matrix)
+    table['defensive_advantages_reversed'] = calculate_defensive_effectiveness(
+        np.column_stack([second, np.where(single, no_type, first)]), type_matrix)
+    typing_index = np.zeros((len(type_names), len(type_names)), dtype=int)
+    typing_index[first, second] = typing_index[second, first] = np.arange(len(table))
+    return table, typing_index
+
+SCORING_MODES = ['legacy', 'multiplier']
+
+def score_defenses(type_codes, typing_table, typing_index, scoring='legacy'):
+    """Score each row of type codes (-1 for no second type) from the typing table, returning score columns.
+
+    'legacy' counts resistances and immunities the way the analysis always has.
+    'multiplier' uses the combined multiplier of both types, so a type one half
+    resists and the other is weak to is neutral, and subtracts weaknesses.
+    """
+    first = type_codes[:, 0]
+    second = np.where(type_codes[:, 1] >= 0, type_codes[:, 1], first)
+    profiles = typing_table.iloc[typing_index[first, second]]
+    if scoring == 'legacy':
+        return {'defensive_advantages': np.where(first <= second, profiles['defensive_advantages'],
+                                                 profiles['defensive_advantages_reversed'])}
+    immunities = profiles['immunities'].to_numpy()
+    resistances = (profiles['resistances_4x'] + profiles['resistances_2x']).to_numpy()
+    weaknesses = (profiles['weaknesses_2x'] + profiles['weaknesses_4x']).to_numpy()
+    return {
+        'defensive_advantages': immunities + resistances - weaknesses,
+        'immunities': immunities,
+        'resistances': resistances,
+        'weaknesses': weaknesses,
+    }
+
+def score_offense(type_codes, type_matrix):
+    """Count how many defending types each Pokémon's STAB types hit super-effectively or neutrally.
+
+    type_codes has one row of two type codes per Pokémon, -1 for no second type.
+    The best multiplier of either type against each defending type is taken.
+    """
+    stab_codes = np.where(type_codes >= 0, type_codes, type_codes[:, :1])
+    best = type_matrix[stab_codes].max(axis=1)
+    return {
+        'stab_super_effective': (best > 1).sum(axis=1),
+        'stab_neutral': (best == 1).sum(axis=1),
     }
+
+# Form index: every Pokémon entry mapped to its species, the species' default
+# form and a form category, built from species varieties and saved with the caches
+FORM_CATEGORY_WORDS = {
+    'gmax': 'gmax', 'mega': 'mega', 'primal': 'primal', 'totem': 'totem',
+    'alola': 'regional', 'galar': 'regional', 'hisui': 'regional', 'paldea': 'regional',
+    'male': 'gender', 'female': 'gender',
+}
+EXCLUDED_FORM_CATEGORIES = ['gmax', 'gender']  # Never analyzed, even with --include-forms
+DEFAULT_FORM_MAX_ID = 10000  # PokéAPI numbers alternate forms from 10001 up
+
+def classify_form(form_name):
+    """Pick the category of an alternate form from the words of its form name."""
+    for word in form_name.split('-'):
+        if word in FORM_CATEGORY_WORDS:
+            return FORM_CATEGORY_WORDS[word]
+    return 'other'
+
+def index_species_forms(form_index, species_data):
+    """Add every variety of a species to the form index."""
+    species_name = species_data['name']
+    varieties = species_data['varieties']
+    default = next((v['pokemon']['name'] for v in varieties if v['is_default']), species_name)
+    for variety in varieties:
+        name = variety['pokemon']['name']
+        if variety['is_default']:
+            category = 'default'
+        else:
+            category = classify_form(name[len(species_name) + 1:] if name.startswith(f"{species_name}-") else name)
+        form_index[name] = {'species': species_data['id'], 'species_name': species_name,
+                            'default': default, 'category': category}
+
+def get_form_category(pokemon, form_index):
+    """Classify a listed Pokémon with the form index, or by its API ID and name if it isn't indexed yet."""
+    form = form_index.get(pokemon['name'])
+    if form is not None:
+        return form['category']
+    if get_resource_id(pokemon['url']) <= DEFAULT_FORM_MAX_ID:
+        return 'default'
+    return classify_form(pokemon['name'])
+
+def format_pokemon_name(pokemon_name, form):
+    """Format Pokémon names with special forms to be more readable, using their form index entry."""
+    species_name = form['species_name']
+    if pokemon_name == species_name or not pokemon_name.startswith(f"{species_name}-"):
+        return pokemon_name.title()
     
-    # Check if it's a prefix form
-    if form_name.lower() in prefix_forms:
-        return f"{prefix_forms[form_name.lower()]} {base_name}"
+    base_name = species_name.title()
+    form_name = pokemon_name[len(species_name) + 1:]
+    parts = form_name.split('-')
     
-    # Special case for Mega X/Y forms
-    if form_name.lower().startswith('mega'):
-        if len(parts) > 2:  # Has X/Y suffix
+    # Mega (with X/Y suffix) and Primal forms go before the name
+    if form['category'] == 'mega':
+        if len(parts) > 1:
             return f"Mega {base_name} {parts[-1].upper()}"
         return f"Mega {base_name}"
+    if form['category'] == 'primal':
+        return f"Primal {base_name}"
     
     # For all other forms, use parentheses
     return f"{base_name} ({form_name.title()})"
@@ -207,111 +997,593 @@ def is_excluded_pokemon(pokemon_name):
     
     return pokemon_name in ultra_beasts or pokemon_name in paradox_pokemon
 
-def get_base_form_name(pokemon_name):
-    """Extract the base form name from a Pokémon name."""
-    # List of words that indicate it's a form name
-    form_indicators = ['mega', 'alolan', 'galarian', 'hisuian', 'paldean', 
-                      'primal', 'eternamax', 'gmax', 'gigantamax']
-    
-    # Split by hyphen and get the first part
-    base_name = pokemon_name.split('-')[0]
-    
-    # If the first part is a form indicator, the second part is the base name
-    if base_name.lower() in form_indicators and len(pokemon_name.split('-')) > 1:
-        base_name = pokemon_name.split('-')[1]
-    
-    return base_name
+# Roster table: one row per listed Pokémon with the fields the analysis reads
+STAT_COLUMNS = ['hp', 'attack', 'defense', 'special-attack', 'special-defense', 'speed']
+ROSTER_FLAGS = ['legendary', 'mythical', 'is_form']
+ROSTER_TABLE_COLUMNS = ['id', 'name', 'dex', 'type1', 'type2', *STAT_COLUMNS, *ROSTER_FLAGS, 'species_known']
 
-def get_pokemon_signature(pokemon_data):
-    """Create a unique signature for a Pokémon based on its stats and types."""
-    types = sorted([t['type']['name'] for t in pokemon_data['types']])
-    stats = [stat['base_stat'] for stat in pokemon_data['stats']]
-    return (tuple(types), tuple(stats))
+def make_roster_entry(pokemon_data, species_data):
+    """Reduce a Pokémon's details and species to a roster table row."""
+    types = [t['type']['name'] for t in pokemon_data['types']]
+    entry = {
+        'id': pokemon_data['id'],
+        'name': pokemon_data['name'],
+        'dex': get_national_dex_number(pokemon_data),
+        'type1': types[0],
+        'type2': types[1] if len(types) > 1 else '',
+        # Forms share their base form's species; an unknown species is excluded like a legendary
+        'legendary': species_data is None or bool(species_data['is_legendary']),
+        'mythical': species_data is not None and bool(species_data['is_mythical']),
+        'is_form': not pokemon_data['is_default'],
+        'species_known': species_data is not None,
+    }
+    entry.update(zip(STAT_COLUMNS, (stat['base_stat'] for stat in pokemon_data['stats'])))
+    return entry
 
-def is_legendary_or_mythical(pokemon_name, pokemon_id, species_cache, pokemon_details_cache):
-    """Check if a Pokémon or its base form is legendary/mythical."""
-    try:
-        # First try with current ID
-        species_data = get_species_info(pokemon_id, species_cache)
-        if species_data['is_legendary'] or species_data['is_mythical']:
-            return True
-        
-        # If it's a form, check the base form
-        if is_special_form(pokemon_name):
-            base_name = get_base_form_name(pokemon_name)
-            base_url = f"https://pokeapi.co/api/v2/pokemon/{base_name}/"
-            base_data = get_pokemon_details(base_url, pokemon_details_cache)
-            if base_data:
-                species_data = get_species_info(base_data['id'], species_cache)
-                return species_data['is_legendary'] or species_data['is_mythical']
-    except Exception:
-        # If we can't determine, better to exclude it
-        return True
-    return False
-
-def get_national_dex_number(pokemon_name, pokemon_id, species_cache, pokemon_details_cache):
-    """Get the National Pokédex number for a Pokémon."""
-    try:
-        # Get species info for the current Pokémon
-        species_data = get_species_info(pokemon_id, species_cache)
-        if 'id' in species_data:
-            return species_data['id']
-    except Exception:
-        # If we can't get the proper number, return the API ID as fallback
-        return pokemon_id
-    return pokemon_id
+def make_roster_table(entries):
+    """Build the roster table from a list of roster entries."""
+    roster = pd.DataFrame(entries, columns=ROSTER_TABLE_COLUMNS)
+    return roster.astype({flag: bool for flag in [*ROSTER_FLAGS, 'species_known']})
 
-def main():
-    # Set up command line arguments
-    parser = argparse.ArgumentParser(description='Analyze Pokémon based on stats and type advantages')
-    parser.add_argument('--include-forms', action='store_true', help='Include mega evolutions, regional forms, and other variants')
-    parser.add_argument('--min-bst', type=int, default=525, help='Minimum base stat total (default: 525)')
-    parser.add_argument('--refresh-cache', action='store_true', help='Ignore cached data and refresh from API')
-    args = parser.parse_args()
-    
+def get_national_dex_number(pokemon_data):
+    """Get the National Pokédex number for a Pokémon from its species URL, without a request."""
+    return get_resource_id(pokemon_data['species']['url'])
+
+class CacheCheckpointer:
+    """Saves the caches every N fetched entries or T seconds during a long fetch run.
+
+    Each save is atomic, so a crash or Ctrl-C loses at most one interval of
+    work. During --refresh-cache the keys already revalidated are saved too,
+    so a restarted refresh resumes where the interrupted one stopped. Entries
+    served from cache don't count, so a warm run never rewrites the files.
+    """
+
+    def __init__(self, pokemon_details_cache, species_cache, every=100, interval=60):
+        self.pokemon_details_cache = pokemon_details_cache
+        self.species_cache = species_cache
+        self.every = every
+        self.interval = interval
+        # Caches migrated on load need saving even if nothing is fetched
+        migrated = pokemon_details_cache.migrated or species_cache.migrated
+        self.saved_progress = None if migrated else self._progress()
+        self.last_saved = time.monotonic()
+        self.lock = threading.Lock()
+
+    def _progress(self):
+        # Every fetch writes a cache entry, or adds a revalidated key or a negative cache entry
+        return (self.pokemon_details_cache.writes + self.species_cache.writes
+                + len(revalidated_keys) + len(negative_cache))
+
+    def tick(self):
+        """Save a checkpoint if enough new entries were fetched or enough time passed."""
+        with self.lock:
+            pending = self._progress() - (self.saved_progress or 0)
+            if pending >= self.every or (pending and time.monotonic() - self.last_saved >= self.interval):
+                self._save()
+
+    def save(self):
+        """Save every cache now if anything was fetched since the last save."""
+        with self.lock:
+            if self._progress() != self.saved_progress:
+                self._save()
+
+    def _save(self):
+        self.pokemon_details_cache.flush()
+        self.species_cache.flush()
+        # Copy first: other workers may be adding entries while the files are written
+        save_dictionary(dict(cache_validators), CACHE_VALIDATORS)
+        save_dictionary(dict(negative_cache), NEGATIVE_CACHE)
+        if revalidate_cache:
+            save_dictionary({'timestamp': time.time(), 'revalidated': list(revalidated_keys)}, REFRESH_CHECKPOINT)
+        self.saved_progress = self._progress()
+        self.last_saved = time.monotonic()
+
+    def finish(self):
+        """Save any remaining entries after a completed run and drop the refresh checkpoint."""
+        self.save()
+        if os.path.exists(REFRESH_CHECKPOINT):
+            os.remove(REFRESH_CHECKPOINT)
+
+def resume_refresh():
+    """Restore the revalidated keys of an interrupted --refresh-cache run, returning how many there were."""
+    checkpoint = load_dictionary(REFRESH_CHECKPOINT)
+    if checkpoint is None or time.time() - checkpoint['timestamp'] > REFRESH_CHECKPOINT_MAX_AGE:
+        return 0
+    revalidated_keys.update(checkpoint['revalidated'])
+    return len(checkpoint['revalidated'])
+
+def get_prefetch_urls(all_pokemon):
+    """List the detail URLs the roster loop will request."""
+    return [pokemon['url'] for pokemon in all_pokemon if not is_excluded_pokemon(pokemon['name'])]
+
+def get_listed_species_id(pokemon, form_index):
+    """Find a listed Pokémon's species ID without fetching its details, or None if it isn't known yet."""
+    form = form_index.get(pokemon['name'])
+    if form is not None:
+        return form['species']
+    pokemon_id = get_resource_id(pokemon['url'])
+    if pokemon_id <= DEFAULT_FORM_MAX_ID:
+        return pokemon_id  # A default form has its species' ID
+    return None
+
+def get_species_prefetch_urls(all_pokemon, form_index):
+    """List the species URLs that can be requested before any details are fetched."""
+    species_ids = (get_listed_species_id(pokemon, form_index) for pokemon in all_pokemon
+                   if not is_excluded_pokemon(pokemon['name']))
+    return list(dict.fromkeys(get_species_url(species_id) for species_id in species_ids if species_id is not None))
+
+def get_details_species_urls(details):
+    """List the unique species URLs referenced by fetched Pokémon details."""
+    return list(dict.fromkeys(data['species']['url'] for data in details if data))
+
+def drop_legendary_species(all_pokemon, species_cache, form_index, checkpointer, fetch=True):
+    """Drop listed Pokémon whose species is legendary or mythical, before their details are fetched.
+
+    Species come from the cache or are fetched here; with fetch=False only
+    cached species are used, for callers that prefetched them and must not
+    block (the asyncio backend). Their varieties are added to the form index,
+    which resolves the species of alternate forms listed after their default
+    form. Pokémon whose species can't be found are kept.
+    """
+    kept = []
+    for pokemon in all_pokemon:
+        species_id = get_listed_species_id(pokemon, form_index)
+        species_data = None
+        if species_id is not None and not is_excluded_pokemon(pokemon['name']):
+            if not fetch:
+                key = resolve_resource_key(get_species_url(species_id))
+                species_data = species_cache[key] if key in species_cache else None
+            else:
+                try:
+                    species_data = get_species_info(species_id, species_cache)
+                except Exception:
+                    pass  # Retried and reported by the roster loop
+                finally:
+                    checkpointer.tick()
+        if species_data is not None:
+            index_species_forms(form_index, species_data)
+            if species_data['is_legendary'] or species_data['is_mythical']:
+                continue
+        kept.append(pokemon)
+    return kept
+
+def prefetch_pokemon_data(all_pokemon, pokemon_details_cache, species_cache, form_index, workers, checkpointer):
+    """Warm the caches concurrently using a bounded thread pool, returning the non-legendary Pokémon.
+
+    Species are fetched first, so no details are downloaded for legendary or mythical Pokémon.
+    """
+    def fetch_details(url):
+        try:
+            return get_pokemon_details(url, pokemon_details_cache)
+        except Exception:
+            # Failures are retried and reported by the main analysis loop
+            return None
+        finally:
+            checkpointer.tick()
+
+    def fetch_species(species_url):
+        try:
+            return get_species_info(species_url, species_cache)
+        except Exception:
+            return None
+        finally:
+            checkpointer.tick()
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        species_urls = get_species_prefetch_urls(all_pokemon, form_index)
+        list(tqdm(executor.map(fetch_species, species_urls), total=len(species_urls), desc="Species"))
+        all_pokemon = drop_legendary_species(all_pokemon, species_cache, form_index, checkpointer)
+        urls = get_prefetch_urls(all_pokemon)
+        details = list(tqdm(executor.map(fetch_details, urls), total=len(urls), desc="Details"))
+        species_urls = get_details_species_urls(details)
+        list(tqdm(executor.map(fetch_species, species_urls), total=len(species_urls), desc="Species"))
+    return all_pokemon
+
+class AsyncPokeAPIClient:
+    """Asyncio counterpart of the fetch functions with per-host in-flight limits.
+
+    Use as an async context manager. Requests draw from the same shared rate
+    limiter as the synchronous functions, so a 429 pauses every worker.
+    """
+
+    def __init__(self, max_in_flight=10, host_limits=None):
+        self.max_in_flight = max_in_flight
+        self.host_limits = host_limits or {}
+        self._semaphores = {}
+        self._in_flight = {}
+        self._session = None
+
+    async def __aenter__(self):
+        if aiohttp is not None and not offline:  # Offline runs never open a connection
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=max(self.max_in_flight, *self.host_limits.values(), 1)),
+                timeout=aiohttp.ClientTimeout(total=HTTP_TIMEOUT),
+                headers=HTTP_HEADERS)
+        return self
+
+    async def __aexit__(self, *exc_info):
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    def _semaphore(self, host):
+        if host not in self._semaphores:
+            self._semaphores[host] = asyncio.Semaphore(self.host_limits.get(host, self.max_in_flight))
+        return self._semaphores[host]
+
+    async def _get(self, url, headers=None):
+        """Return the status code, decoded JSON body (200 only) and headers for a URL."""
+        host = urlparse(url).hostname
+        async with self._semaphore(host):
+            if self._session is None:
+                response = await asyncio.to_thread(http_get, url, headers=headers)
+                data = response.json() if response.status_code == 200 else None
+                return response.status_code, data, response.headers
+
+            wait = rate_limiter.reserve()
+            while wait > 0:
+                await asyncio.sleep(wait)
+                wait = rate_limiter.reserve()
+            async with self._session.get(url, headers=headers) as response:
+                record_response(response.status, response.headers)
+                data = await response.json(content_type=None) if response.status == 200 else None
+                return response.status, data, response.headers
+
+    async def fetch_json(self, url, max_retries=3, retry_delay=1, conditional=False):
+        """Async version of fetch_json."""
+        errors = (json.JSONDecodeError, requests.RequestException, asyncio.TimeoutError)
+        if aiohttp is not None:
+            errors += (aiohttp.ClientError,)
+        for attempt in range(max_retries):
+            try:
+                status, data, headers = await self._get(url, get_conditional_headers(url) if conditional else None)
+                result = handle_response(url, status, headers, data)
+                if result is RETRY:
+                    await asyncio.sleep(retry_delay)
+                elif result is not RETRY_NOW:
+                    return result
+            except errors as e:
+                if attempt < max_retries - 1:
+                    await asyncio.sleep(retry_delay)
+                else:
+                    raise Exception(f"Failed to get data after {max_retries} attempts: {str(e)}")
+        return None
+
+    async def get_cached_resource(self, url, cache, max_retries=3, retry_delay=1):
+        """Async version of get_cached_resource.
+
+        Cache reads and writes run in worker threads, since the SQLite and mmap stores block on disk.
+        """
+        key = resolve_resource_key(url)
+        data = await asyncio.to_thread(lookup_resource, key, cache)
+        if data is not FETCH:
+            return data
+        if key in self._in_flight:
+            return await self._in_flight[key]
+
+        future = self._in_flight[key] = asyncio.get_running_loop().create_future()
+        try:
+            cached = await asyncio.to_thread(cache.__contains__, key)
+            data = await self.fetch_json(url, max_retries, retry_delay, conditional=cached)
+            data = await asyncio.to_thread(store_fetched_resource, cache, key, data)
+            future.set_result(data)
+            return data
+        except BaseException as e:
+            future.set_exception(e)
+            future.exception()  # Mark retrieved so an unawaited failure isn't logged
+            raise
+        finally:
+            del self._in_flight[key]
+
+    async def get_pokemon_details(self, url, details_cache, max_retries=3, retry_delay=1):
+        """Async version of get_pokemon_details."""
+        return await self.get_cached_resource(url, details_cache, max_retries, retry_delay)
+
+    async def get_species_info(self, species, species_cache, max_retries=3, retry_delay=1):
+        """Async version of get_species_info."""
+        url = species if isinstance(species, str) else get_species_url(species)
+        return await self.get_cached_resource(url, species_cache, max_retries, retry_delay)
+
+    async def get_type_effectiveness(self, type_name, cached_relations=None, type_members=None):
+        """Async version of get_type_effectiveness."""
+        type_data = await self.fetch_json(get_type_url(type_name), conditional=cached_relations is not None)
+        return read_type_relations(type_name, type_data, cached_relations, type_members)
+
+async def prefetch_pokemon_data_async(all_pokemon, pokemon_details_cache, species_cache, form_index, max_in_flight,
+                                      checkpointer):
+    """Warm the caches with the asyncio backend, returning the non-legendary Pokémon.
+
+    Species are fetched first, so no details are downloaded for legendary or mythical Pokémon.
+    """
+    async with AsyncPokeAPIClient(host_limits={'pokeapi.co': max_in_flight}) as client:
+        async def fetch_details(url):
+            try:
+                return await client.get_pokemon_details(url, pokemon_details_cache)
+            except Exception:
+                # Failures are retried and reported by the main analysis loop
+                return None
+            finally:
+                await asyncio.to_thread(checkpointer.tick)  # A checkpoint writes whole cache files
+
+        async def fetch_species(species_url):
+            try:
+                return await client.get_species_info(species_url, species_cache)
+            except Exception:
+                return None
+            finally:
+                await asyncio.to_thread(checkpointer.tick)
+
+        species_urls = get_species_prefetch_urls(all_pokemon, form_index)
+        await async_tqdm.gather(*(fetch_species(species_url) for species_url in species_urls), desc="Species")
+        # Species that failed above are left to the roster loop rather than refetched here with blocking requests
+        all_pokemon = await asyncio.to_thread(drop_legendary_species, all_pokemon, species_cache, form_index,
+                                              checkpointer, fetch=False)
+        urls = get_prefetch_urls(all_pokemon)
+        details = await async_tqdm.gather(*(fetch_details(url) for url in urls), desc="Details")
+        species_urls = get_details_species_urls(details)
+        await async_tqdm.gather(*(fetch_species(species_url) for species_url in species_urls), desc="Species")
+    return all_pokemon
+
+# Roster snapshot: the roster table kept as typed binary columns, so a warm
+# run loads it without opening the caches
+ROSTER_SNAPSHOT_MAGIC = b'PKROSTER'
+ROSTER_SNAPSHOT_VERSION = 1
+ROSTER_COLUMNS = (('ids', 'I'), ('dex', 'I'), ('types', 'b'), ('stats', 'H'), ('flags', 'B'))
+
+def get_cache_fingerprint(backend, compression):
+    """Identify the current contents of the type chart and resource caches without loading them."""
+    def stat(filename):
+        try:
+            file_stat = os.stat(filename)
+            return [filename, file_stat.st_size, file_stat.st_mtime_ns]
+        except FileNotFoundError:
+            return [filename, None]
+
+    fingerprint = [ROSTER_SNAPSHOT_VERSION, stat(TYPE_CHART_FILENAME), stat(FORM_INDEX)]
+    for filename in (POKEMON_DETAILS_CACHE, SPECIES_INFO_CACHE):
+        if backend == 'sqlite':
+            # WAL checkpoints touch the file without changing the data, so ask SQLite instead of stat()
+            table = os.path.splitext(os.path.basename(filename))[0]
+            state = None
+            if os.path.exists(SQLITE_CACHE):
+                connection, lock = get_sqlite_connection(SQLITE_CACHE)
+                with lock:
+                    try:
+                        state = list(connection.execute(
+                            f'SELECT COUNT(*), MAX(rowid), TOTAL(LENGTH(value)) FROM {table}').fetchone())
+                    except sqlite3.OperationalError:
+                        pass  # Table not created yet
+            fingerprint.append([table, state])
+        elif backend == 'mmap':
+            fingerprint.append(stat(f"{os.path.splitext(filename)[0]}.idx"))  # Rewritten on every flush
+        else:
+            fingerprint.append(stat(filename + COMPRESSION_SUFFIXES.get(compression, '')))
+    return fingerprint
+
+def save_roster_snapshot(roster, includes_forms, fingerprint):
+    """Write the roster table as binary columns behind a small JSON header."""
+    type_names = sorted(set(roster['type1']) | set(roster['type2']) - {''})
+    type_codes = {type_name: code for code, type_name in enumerate(type_names)}
+    type_codes[''] = -1  # No second type
+    columns = {
+        'ids': roster['id'],
+        'dex': roster['dex'],
+        'types': np.column_stack([roster['type1'].map(type_codes), roster['type2'].map(type_codes)]),
+        'stats': roster[STAT_COLUMNS],
+        'flags': sum(roster[flag].astype(int) * (1 << bit) for bit, flag in enumerate(ROSTER_FLAGS)),
+    }
+    names = '\n'.join(roster['name']).encode()
+    header = json.dumps({
+        'version': ROSTER_SNAPSHOT_VERSION,
+        'fingerprint': fingerprint,
+        'includes_forms': includes_forms,
+        'count': len(roster),
+        'type_names': type_names,
+    }).encode()
+    temp_filename = f"{ROSTER_SNAPSHOT}.{os.getpid()}.tmp"
+    with open(temp_filename, 'wb') as file:
+        file.write(ROSTER_SNAPSHOT_MAGIC)
+        blocks = [np.asarray(columns[name], dtype=typecode).tobytes() for name, typecode in ROSTER_COLUMNS]
+        for block in [header, names] + blocks:
+            file.write(struct.pack('<I', len(block)))
+            file.write(block)
+    os.replace(temp_filename, ROSTER_SNAPSHOT)
+
+def load_roster_snapshot(include_forms, fingerprint):
+    """Load the roster table from the snapshot, or return None if it is missing, stale or lacks the requested forms."""
+    if not os.path.exists(ROSTER_SNAPSHOT):
+        return None
+    with open(ROSTER_SNAPSHOT, 'rb') as file:
+        data = file.read()
+    if not data.startswith(ROSTER_SNAPSHOT_MAGIC):
+        return None
+    blocks = []
+    offset = len(ROSTER_SNAPSHOT_MAGIC)
+    while offset < len(data):
+        (length,) = struct.unpack_from('<I', data, offset)
+        blocks.append(data[offset + 4:offset + 4 + length])
+        offset += 4 + length
+    header = json.loads(blocks[0])
+    if header['version'] != ROSTER_SNAPSHOT_VERSION or header['fingerprint'] != fingerprint:
+        return None
+    if include_forms and not header['includes_forms']:
+        return None
+    count = header['count']
+    columns = {name: np.frombuffer(block, dtype=typecode)
+               for (name, typecode), block in zip(ROSTER_COLUMNS, blocks[2:])}
+    type_names = np.array(header['type_names'] + [''])  # Code -1 picks the empty name
+    types = columns['types'].reshape(count, 2)
+    roster = pd.DataFrame({
+        'id': columns['ids'].astype(int),
+        'name': blocks[1].decode().split('\n') if count else [],
+        'dex': columns['dex'].astype(int),
+        'type1': type_names[types[:, 0]],
+        'type2': type_names[types[:, 1]],
+    })
+    roster[STAT_COLUMNS] = columns['stats'].reshape(count, len(STAT_COLUMNS)).astype(int)
+    for bit, flag in enumerate(ROSTER_FLAGS):
+        roster[flag] = (columns['flags'] >> bit & 1).astype(bool)
+    roster['species_known'] = True  # Runs with unknown species don't save a snapshot
+    return roster
+
+def build_roster(all_pokemon, pokemon_details_cache, species_info_cache, form_index, checkpointer):
+    """Collect the roster entry of every listed Pokémon, returning the roster table and the number of errors.
+
+    The varieties of every species seen are added to the form index.
+    """
+    print(f"Collecting {len(all_pokemon)} Pokémons...")
+    entries = []
+    error_count = 0
+
+    for pokemon in tqdm(all_pokemon):
+        checkpointer.tick()
+        try:
+            # Skip Paradox Pokémon and Ultra Beasts before making API calls
+            if is_excluded_pokemon(pokemon['name']):
+                continue
+
+            # Get basic details
+            pokemon_data = get_pokemon_details(pokemon['url'], pokemon_details_cache)
+            if pokemon_data is None:
+                if not is_known_missing(resolve_resource_key(pokemon['url'])):
+                    # Not a permanent failure: count it, so no snapshot hides the Pokémon from the next run
+                    raise Exception("details could not be fetched")
+                continue
+
+            species_data = get_species_info(pokemon_data['species']['url'], species_info_cache)
+            if species_data is not None:
+                index_species_forms(form_index, species_data)
+            entries.append(make_roster_entry(pokemon_data, species_data))
+
+        except Exception as e:
+            error_count += 1
+            print(f"Error processing {pokemon['name']}: {str(e)}")
+
+    return make_roster_table(entries), error_count
+
+def get_unique_forms(candidates):
+    """Return the roster index of one Pokémon per species and signature (types in either order plus stats).
+
+    The default form is preferred, then listing order, so forms identical to
+    their base form or to each other are dropped.
+    """
+    signatures = candidates[['dex', *STAT_COLUMNS, 'is_form']].assign(
+        first_type=np.where(candidates['type1'] <= candidates['type2'], candidates['type1'], candidates['type2']),
+        second_type=np.where(candidates['type1'] <= candidates['type2'], candidates['type2'], candidates['type1']),
+    )
+    return (signatures.sort_values('is_form', kind='stable')
+            .drop_duplicates(subset=['dex', 'first_type', 'second_type', *STAT_COLUMNS])
+            .index.sort_values())
+
+def analyze_roster(roster, form_index, type_names, type_matrix, typing_table, typing_index, min_bst, include_forms,
+                   scoring='legacy', types=None):
+    """Score every Pokémon in the roster table that passes the filters, returning the results table."""
+    print(f"Analyzing {len(roster)} Pokémons...")
+
+    # Apply every filter to the whole roster at once (forms are checked through their species)
+    stats_total = roster[STAT_COLUMNS].sum(axis=1)
+    keep = ~(roster['legendary'] | roster['mythical']) & (stats_total >= min_bst)
+    if not include_forms:
+        keep &= ~roster['is_form']  # A snapshot built with --include-forms also serves runs without it
+    if types:
+        keep &= roster['type1'].isin(types) | roster['type2'].isin(types)
+    candidates = roster[keep]
+
+    unique = get_unique_forms(candidates)
+    selected = roster.loc[unique]
+    results = pd.DataFrame({
+        'name': [format_pokemon_name(name, form_index[name]) for name in selected['name']],
+        'id': selected['dex'],  # Use National Dex number instead of API ID
+        'types': [', '.join(t.title() for t in types if t) for types in zip(selected['type1'], selected['type2'])],
+        'base_stats_total': stats_total[unique],
+    }).reset_index(drop=True)
+
+    # Score every remaining Pokémon at once
+    if len(results):
+        type_codes = {type_name: code for code, type_name in enumerate(type_names)}
+        type_codes[''] = -1  # No second type
+        scored_types = np.column_stack([selected['type1'].map(type_codes), selected['type2'].map(type_codes)])
+        scores = score_defenses(scored_types, typing_table, typing_index, scoring)
+        scores.update(score_offense(scored_types, type_matrix))
+        for column, values in scores.items():
+            results[column] = values
+
+    return results
+
+def fetch_roster(args, form_index):
+    """Load the caches, fetch whatever is missing and build the roster, returning it with the type chart."""
     print("Fetching Pokémon data...")
 
     # Load cached data or create new caches if needed
+    global revalidate_cache, keep_full_payloads
+    keep_full_payloads = args.full_payloads
+    type_chart = load_dictionary(TYPE_CHART_FILENAME)
+    cache_validators.update((get_resource_key(key), validators)
+                            for key, validators in (load_dictionary(CACHE_VALIDATORS) or {}).items())
+    pokemon_details_cache = open_cache(POKEMON_DETAILS_CACHE, 'pokemon', args.cache_backend, args.cache_compression)
+    species_info_cache = open_cache(SPECIES_INFO_CACHE, 'pokemon-species', args.cache_backend, args.cache_compression)
+    negative_cache.update(prune_negative_cache(load_dictionary(NEGATIVE_CACHE) or {}))
+    print(f"Loaded {len(pokemon_details_cache)} Pokémon details and {len(species_info_cache)} species from cache.")
     if args.refresh_cache:
-        type_chart = None
-        pokemon_details_cache = {}
-        species_info_cache = {}
-        print("Cache refresh requested. All data will be fetched from API.")
-    else:
-        type_chart = load_dictionary(TYPE_CHART_FILENAME)
-        pokemon_details_cache = load_dictionary(POKEMON_DETAILS_CACHE) or {}
-        species_info_cache = load_dictionary(SPECIES_INFO_CACHE) or {}
-        print(f"Loaded {len(pokemon_details_cache)} Pokémon details and {len(species_info_cache)} species from cache.")
+        # Cached entries are kept and revalidated with conditional requests, so unchanged ones cost a 304
+        revalidate_cache = True
+        print("Cache refresh requested. Cached data will be revalidated against the API.")
+        resumed = resume_refresh()
+        if resumed:
+            print(f"Resuming interrupted refresh: {resumed} entries were already revalidated.")
     
-    # First, build a type effectiveness chart if not present
-    if type_chart is None:
-        print("Type effectiveness chart not found.")
+    # First, build a type effectiveness chart if not present. The same responses list
+    # every Pokémon of each type, which --types needs to filter before fetching details
+    type_members = load_dictionary(TYPE_MEMBERS_FILENAME)
+    if offline:
+        # Missing type data is reported together with everything else once the roster was collected
+        if type_chart is None:
+            missing_resources.add('type')
+        elif args.types and type_members is None:
+            missing_resources.add('type (membership lists for --types)')
+        else:
+            print("Loaded existing type effectiveness chart.")
+    elif type_chart is None or args.refresh_cache or (args.types and type_members is None):
+        if type_chart is None:
+            print("Type effectiveness chart not found.")
+        cached_chart = type_chart or {}
         type_chart = {}
-        all_types = requests.get("https://pokeapi.co/api/v2/type").json()['results']
+        type_members = type_members or {}
+        # A resumed --refresh-cache run reuses the type list and types its checkpoint already revalidated
+        if cached_chart and is_cache_fresh(resolve_resource_key(TYPE_LIST_URL)):
+            type_names = list(cached_chart)
+        else:
+            type_list = fetch_json(TYPE_LIST_URL)
+            if type_list is None:
+                raise Exception("Failed to get the list of types")
+            type_names = [type_info['name'] for type_info in type_list['results']]
         print("Building type effectiveness chart...")
-        for type_info in tqdm(all_types):
-            if type_info['name'] in ['unknown', 'shadow']:  # Skip non-battle types
+        for type_name in tqdm(type_names):
+            if type_name in ['unknown', 'shadow']:  # Skip non-battle types
                 continue
-            type_chart[type_info['name']] = get_type_effectiveness(type_info['name'])
-            time.sleep(0.1)  # Avoid hitting rate limits
-        save_dictionary(type_chart, TYPE_CHART_FILENAME)
+            # Types without a membership list need a full response, not a 304
+            cached_relations = cached_chart.get(type_name) if type_name in type_members else None
+            if cached_relations is not None and is_cache_fresh(resolve_resource_key(get_type_url(type_name))):
+                type_chart[type_name] = cached_relations
+            else:
+                type_chart[type_name] = get_type_effectiveness(type_name, cached_relations, type_members)
+        if type_chart != cached_chart:
+            save_dictionary(type_chart, TYPE_CHART_FILENAME)  # Unchanged, it keeps the compiled matrix and snapshot valid
+        save_dictionary(type_members, TYPE_MEMBERS_FILENAME)
         print("Type effectiveness chart built and saved.")
     else:
         print("Loaded existing type effectiveness chart.")
+    if type_chart is not None:
+        check_type_filter(args.types, [type_name for type_name in type_chart if type_name not in MATRIX_EXCLUDED_TYPES])
     
-    # Get all Pokémon - use a higher limit to make sure we get all of them
-    all_pokemon = []
-
-    # Get all Pokémon and forms in a single call
-    all_pokemon = get_all_pokemon(limit=4000)  # This will cover all base Pokémon and forms
-    
-    # Filter forms based on criteria
+    # Get all Pokémon and forms, filtering each page of the listing as it arrives
     filtered_pokemon = []
-    for pokemon in all_pokemon:
-        if is_gmax_or_gender_form(pokemon['name']):
+    for pokemon in iter_all_pokemon(refresh=args.refresh_cache):
+        category = get_form_category(pokemon, form_index)
+        if category in EXCLUDED_FORM_CATEGORIES:
             # Always exclude Gmax and gender variants
             continue
-        elif not is_special_form(pokemon['name']):
+        elif category == 'default':
             # Always include base forms
             filtered_pokemon.append(pokemon)
         elif args.include_forms:
@@ -320,103 +1592,163 @@ def main():
     
     all_pokemon = filtered_pokemon
 
-    print(f"Analyzing {len(all_pokemon)} Pokémons...")
-    results = []
-    error_count = 0
-    processed_signatures = {}  # Track unique Pokémon signatures
-    
-    for pokemon in tqdm(all_pokemon):
-        try:
-            # Skip Paradox Pokémon and Ultra Beasts before making API calls
-            if is_excluded_pokemon(pokemon['name']):
-                continue
-            
-            # Get basic details
-            pokemon_data = get_pokemon_details(pokemon['url'], pokemon_details_cache)
-            if pokemon_data is None:
-                continue
-            
-            pokemon_id = pokemon_data['id']
-            national_dex_no = get_national_dex_number(pokemon_data['name'], pokemon_id, species_info_cache, pokemon_details_cache)
-            
-            # Check if legendary/mythical (including base form check)
-            if is_legendary_or_mythical(pokemon_data['name'], pokemon_id, species_info_cache, pokemon_details_cache):
-                continue
-            
-            # Calculate base stats total
-            stats_total = sum(stat['base_stat'] for stat in pokemon_data['stats'])
-            if stats_total < args.min_bst:
-                continue
-            
-            # Get Pokémon signature
-            pokemon_signature = get_pokemon_signature(pokemon_data)
-            base_name = get_base_form_name(pokemon_data['name'])
-            
-            # Skip if this is an alternate form with the same signature as its base form
-            if base_name != pokemon_data['name']:
-                try:
-                    base_url = f"https://pokeapi.co/api/v2/pokemon/{base_name}/"
-                    base_data = get_pokemon_details(base_url, pokemon_details_cache)
-                    base_signature = get_pokemon_signature(base_data)
-                    if base_signature == pokemon_signature:
-                        continue
-                except:
-                    pass  # If we can't get base form data, treat this as a unique form
-            
-            # Skip duplicates based on signature
-            signature_key = (base_name, pokemon_signature)
-            if signature_key in processed_signatures:
-                continue
-            processed_signatures[signature_key] = True
-            
-            # Get Pokémon types
-            pokemon_types = [t['type']['name'] for t in pokemon_data['types']]
-            
-            # Calculate defensive advantages
-            defensive_score = calculate_defensive_effectiveness(pokemon_types, type_chart)
-            
-            results.append({
-                'name': format_pokemon_name(pokemon_data['name']),
-                'id': national_dex_no,  # Use National Dex number instead of API ID
-                'types': ', '.join(t.title() for t in pokemon_types),
-                'base_stats_total': stats_total,
-                'defensive_advantages': defensive_score
-            })
-            
-            if len(results) % 20 == 0:
-                time.sleep(0.5)
-            
-        except Exception as e:
-            error_count += 1
-            print(f"Error processing {pokemon['name']}: {str(e)}")
-    
+    # Keep only Pokémon of the requested types; ones missing from the membership lists are checked after fetching
+    if args.types and type_members is not None:
+        pokemon_types = get_pokemon_types(type_members)
+        all_pokemon = [pokemon for pokemon in all_pokemon
+                       if pokemon['name'] not in pokemon_types or set(pokemon_types[pokemon['name']]) & set(args.types)]
+        print(f"Kept {len(all_pokemon)} Pokémons of types {', '.join(args.types)}.")
+
+    indexed_forms = dict(form_index)
+    checkpointer = CacheCheckpointer(pokemon_details_cache, species_info_cache,
+                                     every=args.checkpoint_every, interval=args.checkpoint_interval)
+    try:
+        # Species come first, so legendary and mythical Pokémon are dropped before their details are
+        # downloaded; with several workers everything is fetched up front so the roster loop runs from cache
+        listed_count = len(all_pokemon)
+        if offline:
+            all_pokemon = drop_legendary_species(all_pokemon, species_info_cache, form_index, checkpointer)
+        elif args.backend == 'asyncio':
+            print(f"Prefetching data with up to {args.workers} requests in flight...")
+            all_pokemon = asyncio.run(prefetch_pokemon_data_async(all_pokemon, pokemon_details_cache, species_info_cache,
+                                                                  form_index, args.workers, checkpointer))
+        elif args.workers > 1:
+            print(f"Prefetching data with {args.workers} workers...")
+            all_pokemon = prefetch_pokemon_data(all_pokemon, pokemon_details_cache, species_info_cache, form_index,
+                                                args.workers, checkpointer)
+        else:
+            all_pokemon = drop_legendary_species(all_pokemon, species_info_cache, form_index, checkpointer)
+        print(f"Skipped {listed_count - len(all_pokemon)} legendary and mythical Pokémons.")
+
+        roster, error_count = build_roster(all_pokemon, pokemon_details_cache, species_info_cache, form_index,
+                                           checkpointer)
+    finally:
+        # Keep everything fetched so far, even after a crash or Ctrl-C
+        checkpointer.save()
+
     # Save caches for future use
-    save_dictionary(pokemon_details_cache, POKEMON_DETAILS_CACHE)
-    save_dictionary(species_info_cache, SPECIES_INFO_CACHE)
+    checkpointer.finish()
+    if form_index != indexed_forms:
+        save_dictionary(form_index, FORM_INDEX)
+    if missing_resources:
+        report_missing_resources()
     print(f"Saved {len(pokemon_details_cache)} Pokémon details and {len(species_info_cache)} species info to cache")
     
     if error_count > 0:
         print(f"\nTotal errors encountered: {error_count}")
+    elif roster['species_known'].all() and not args.types:
+        # Only a complete roster is reused (not one narrowed by --types); the fingerprint is taken after the caches were saved
+        save_roster_snapshot(roster, args.include_forms, get_cache_fingerprint(args.cache_backend, args.cache_compression))
+
+    return roster, type_chart
+
+SORT_KEYS = {
+    'defense': ['defensive_advantages', 'base_stats_total'],
+    'offense': ['stab_super_effective', 'stab_neutral', 'base_stats_total'],
+}
+
+def main():
+    # Set up command line arguments
+    parser = argparse.ArgumentParser(description='Analyze Pokémon based on stats and type advantages')
+    parser.add_argument('--include-forms', action='store_true', help='Include mega evolutions, regional forms, and other variants')
+    parser.add_argument('--min-bst', type=int, default=525, help='Minimum base stat total (default: 525)')
+    parser.add_argument('--refresh-cache', action='store_true', help='Revalidate cached data against the API using conditional requests')
+    parser.add_argument('--workers', type=int, default=1, help='Number of concurrent fetch workers (default: 1, serial)')
+    parser.add_argument('--cache-backend', choices=['json', 'sqlite', 'mmap'], default='json',
+                        help=f'Storage for the details and species caches (sqlite uses {SQLITE_CACHE}; '
+                             'mmap uses memory-mapped .dat files with .idx offset indexes)')
+    parser.add_argument('--cache-compression', choices=['none', 'gzip', 'zstd'], default='none',
+                        help='Compress the json backend cache files (zstd needs the zstandard package)')
+    parser.add_argument('--full-payloads', action='store_true',
+                        help='Cache complete API payloads instead of only the fields the analysis uses')
+    parser.add_argument('--checkpoint-every', type=int, default=100,
+                        help='Save the caches after this many fetched entries (default: 100)')
+    parser.add_argument('--checkpoint-interval', type=float, default=60,
+                        help='Save the caches at least this often, in seconds (default: 60)')
+    parser.add_argument('--negative-ttl', type=float, default=NEGATIVE_CACHE_TTL / 3600,
+                        help='Hours before a resource the API reported missing is requested again (default: 168)')
+    parser.add_argument('--listing-ttl', type=float, default=POKEMON_LISTING_TTL / 3600,
+                        help='Hours before the cached Pokémon listing is checked against the API count (default: 24)')
+    parser.add_argument('--offline', action='store_true',
+                        help='Use only cached data and never touch the network; missing resources are listed and the run fails')
+    parser.add_argument('--timeout', type=float, default=HTTP_TIMEOUT, help=f'HTTP timeout in seconds (default: {HTTP_TIMEOUT})')
+    parser.add_argument('--rate', type=float, default=10.0, help='Maximum API requests per second (default: 10)')
+    parser.add_argument('--burst', type=int, default=10, help='Requests allowed in a burst above --rate (default: 10)')
+    parser.add_argument('--backend', choices=['threads', 'asyncio'], default='threads',
+                        help='Concurrent fetch backend; with asyncio, --workers is the in-flight limit for pokeapi.co')
+    parser.add_argument('--scoring', choices=SCORING_MODES, default='legacy',
+                        help='Defensive score: legacy counts resistances and immunities; multiplier uses combined '
+                             'multipliers and subtracts weaknesses (default: legacy)')
+    parser.add_argument('--types', type=lambda value: value.lower().split(','), metavar='TYPE[,TYPE...]',
+                        help='Only analyze Pokémon with at least one of these types, filtered before details are fetched')
+    parser.add_argument('--sort-by', choices=list(SORT_KEYS), default='defense',
+                        help='Rank by defensive advantages or by STAB types hit super-effectively (default: defense)')
+    parser.add_argument('--export-typings', metavar='CSV',
+                        help='Save the defensive profile of every single and dual typing to this CSV file')
+    args = parser.parse_args()
+    if args.rate <= 0:
+        parser.error('--rate must be greater than 0')
+    if args.burst < 1:
+        parser.error('--burst must be at least 1')
+    if args.workers < 1:
+        parser.error('--workers must be at least 1')
+    
+    # Every fetch shares one keep-alive session sized for the number of workers
+    configure_session(pool_size=max(args.workers, HTTP_POOL_SIZE), timeout=args.timeout)
+    configure_rate_limit(args.rate, args.burst)
+    configure_negative_cache(args.negative_ttl)
+    configure_listing_cache(args.listing_ttl)
+    if args.offline and args.refresh_cache:
+        parser.error('--offline and --refresh-cache cannot be used together')
+    global offline
+    offline = args.offline
+
+    if args.cache_compression == 'zstd' and zstandard is None:
+        print("zstandard is not installed, compressing caches with gzip instead.")
+        args.cache_compression = 'gzip'
+
+    form_index = load_dictionary(FORM_INDEX) or {}
+
+    # A snapshot from an earlier run over unchanged caches skips loading them and the API listing
+    # (once the cached listing expires, a full run checks whether new Pokémon were added)
+    roster = None
+    if not args.refresh_cache and (args.offline or is_listing_fresh()):
+        roster = load_roster_snapshot(args.include_forms, get_cache_fingerprint(args.cache_backend, args.cache_compression))
+    if roster is not None:
+        print(f"Loaded roster snapshot of {len(roster)} Pokémons.")
+        type_chart = None
+    else:
+        roster, type_chart = fetch_roster(args, form_index)
+
+    type_names, type_matrix = load_type_matrix(type_chart)
+    check_type_filter(args.types, type_names)
+    typing_table, typing_index = build_typing_table(type_names, type_matrix)
+    if args.export_typings:
+        typing_table.to_csv(args.export_typings, index=False)
+        print(f"Typing profiles saved to '{args.export_typings}'")
+    results = analyze_roster(roster, form_index, type_names, type_matrix, typing_table, typing_index, args.min_bst,
+                             args.include_forms, args.scoring, args.types)
         
-    if not results:
+    if results.empty:
         print("No Pokémon matched the criteria!")
         return
         
-    # Convert to DataFrame and sort by our criteria
-    df = pd.DataFrame(results)
-    
-    # Sort by defensive effectiveness score, then by base stats
-    df = df.sort_values(by=['defensive_advantages', 'base_stats_total'], ascending=False)
+    # Sort by defensive effectiveness score (or STAB coverage), then by base stats
+    df = results.sort_values(by=SORT_KEYS[args.sort_by], ascending=False)
     
     # Display top results
-    print(f"\nTop Non-Legendary Pokémon (Base Stats ≥ {args.min_bst}) sorted by Type Advantages:")
+    sort_text = "STAB Coverage" if args.sort_by == 'offense' else "Type Advantages"
+    print(f"\nTop Non-Legendary Pokémon (Base Stats ≥ {args.min_bst}) sorted by {sort_text}:")
     pd.set_option('display.max_rows', None)
+    pd.set_option('display.max_columns', None)
     pd.set_option('display.width', 1000)
-    print(df[['name', 'id', 'types', 'base_stats_total', 'defensive_advantages']])
+    print(df)
     
     # Save results to CSV
     forms_text = "_with_forms" if args.include_forms else ""
-    csv_filename = f'pokemon_analysis{forms_text}.csv'
+    scoring_text = f"_{args.scoring}" if args.scoring != 'legacy' else ""
+    types_text = f"_types-{'-'.join(sorted(set(args.types)))}" if args.types else ""  # Never overwrite the full analysis
+    csv_filename = f'pokemon_analysis{forms_text}{scoring_text}{types_text}.csv'
     df.to_csv(csv_filename, index=False)
     print(f"\nResults saved to '{csv_filename}'")
 
@@ -0,0 +1,45 @@
+import os
+import tempfile
+import unittest
+
+import WorthyPokemons as wp
+
+ENTRIES = {
+    'pokemon/6': {'id': 6, 'name': 'charizard'},
+    'pokemon/25': {'id': 25, 'name': 'pikachu'},
+    'pokemon/10034': {'id': 10034, 'name': 'charizard-mega-x'},
+}
+
+
+class JSONCacheStoreTest(unittest.TestCase):
+    def setUp(self):
+        self.cwd = os.getcwd()
+        self.temp_dir = tempfile.TemporaryDirectory()
+        os.chdir(self.temp_dir.name)
+
+    def tearDown(self):
+        os.chdir(self.cwd)
+        self.temp_dir.cleanup()
+
+    def fill(self, cache):
+        for key, value in ENTRIES.items():
+            cache[key] = value
+        cache.flush()
+
+    def test_round_trip(self):
+        for compression in ['none', 'gzip'] + (['zstd'] if wp.zstandard is not None else []):
+            with self.subTest(compression=compression):
+                self.fill(wp.JSONCacheStore(wp.POKEMON_DETAILS_CACHE, 'pokemon', compression))
+                self.assertEqual(dict(wp.JSONCacheStore(wp.POKEMON_DETAILS_CACHE, 'pokemon', compression)), ENTRIES)
+
+    def test_converts_compression(self):
+        self.fill(wp.JSONCacheStore(wp.POKEMON_DETAILS_CACHE, 'pokemon'))
+        cache = wp.JSONCacheStore(wp.POKEMON_DETAILS_CACHE, 'pokemon', 'gzip')
+        self.assertEqual(dict(cache), ENTRIES)
+        cache.flush()
+        self.assertFalse(os.path.exists(wp.POKEMON_DETAILS_CACHE))
+        self.assertTrue(os.path.exists(wp.POKEMON_DETAILS_CACHE + '.gz'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,71 @@
+import os
+import tempfile
+import unittest
+
+import WorthyPokemons as wp
+
+ENTRIES = {
+    'pokemon/6': {'id': 6, 'name': 'charizard'},
+    'pokemon/25': {'id': 25, 'name': 'pikachu'},
+    'pokemon/10034': {'id': 10034, 'name': 'charizard-mega-x'},
+}
+
+
+class MmapCacheStoreTest(unittest.TestCase):
+    def setUp(self):
+        self.cwd = os.getcwd()
+        self.temp_dir = tempfile.TemporaryDirectory()
+        os.chdir(self.temp_dir.name)
+
+    def tearDown(self):
+        os.chdir(self.cwd)
+        self.temp_dir.cleanup()
+
+    def fill(self, cache):
+        for key, value in ENTRIES.items():
+            cache[key] = value
+        cache.flush()
+
+    def reopen_store(self):
+        return dict(wp.MmapCacheStore(wp.POKEMON_DETAILS_CACHE, 'pokemon').items())
+
+    def test_round_trip(self):
+        cache = wp.MmapCacheStore(wp.POKEMON_DETAILS_CACHE, 'pokemon')
+        self.fill(cache)
+        del cache['pokemon/25']
+        cache['pokemon/6'] = {'id': 6, 'name': 'charizard', 'updated': True}
+        cache.flush()
+        self.assertEqual(self.reopen_store(), {'pokemon/6': {'id': 6, 'name': 'charizard', 'updated': True},
+                                               'pokemon/10034': ENTRIES['pokemon/10034']})
+
+    def test_compacts_rewritten_entries(self):
+        cache = wp.MmapCacheStore(wp.POKEMON_DETAILS_CACHE, 'pokemon')
+        self.fill(cache)
+        size = os.path.getsize(cache.data_filename)
+        for _ in range(10):
+            self.fill(cache)
+        self.assertLessEqual(os.path.getsize(cache.data_filename), 2 * size)
+        self.assertEqual(self.reopen_store(), ENTRIES)
+
+    def test_rolls_compaction_forward(self):
+        cache = wp.MmapCacheStore(wp.POKEMON_DETAILS_CACHE, 'pokemon')
+        self.fill(cache)
+        # Simulate a crash after the compacted files were written but before they were swapped in
+        os.rename(cache.data_filename, f"{cache.data_filename}.compact")
+        os.rename(cache.index_filename, f"{cache.index_filename}.compact")
+        with open(cache.data_filename, 'wb') as file:
+            file.write(b'stale')
+        self.assertEqual(self.reopen_store(), ENTRIES)
+        self.assertFalse(os.path.exists(f"{cache.data_filename}.compact"))
+
+    def test_discards_partial_compaction(self):
+        cache = wp.MmapCacheStore(wp.POKEMON_DETAILS_CACHE, 'pokemon')
+        self.fill(cache)
+        with open(f"{cache.data_filename}.compact", 'wb') as file:
+            file.write(b'partial')
+        self.assertEqual(self.reopen_store(), ENTRIES)
+        self.assertFalse(os.path.exists(f"{cache.data_filename}.compact"))
+
+
+if __name__ == '__main__':
+    unittest.main()
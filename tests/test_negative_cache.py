@@ -0,0 +1,33 @@
+import time
+import unittest
+
+import WorthyPokemons as wp
+
+URL = 'https://pokeapi.co/api/v2/pokemon-species/999/'
+
+
+class NegativeCacheTest(unittest.TestCase):
+    def tearDown(self):
+        wp.negative_cache.clear()
+        wp.revalidate_cache = False
+
+    def test_skips_known_missing(self):
+        wp.remember_failure(URL, 404, 'HTTP 404')
+        self.assertTrue(wp.is_known_missing('pokemon-species/999'))
+
+    def test_expired_entry_is_retried(self):
+        wp.negative_cache['pokemon-species/999'] = {'reason': 'HTTP 404', 'status': 404,
+                                                    'timestamp': time.time() - wp.NEGATIVE_CACHE_TTL - 1}
+        self.assertFalse(wp.is_known_missing('pokemon-species/999'))
+
+    def test_refresh_retries_only_earlier_failures(self):
+        wp.revalidate_cache = True
+        wp.negative_cache['pokemon-species/999'] = {'reason': 'HTTP 404', 'status': 404,
+                                                    'timestamp': wp.run_started - 60}
+        self.assertFalse(wp.is_known_missing('pokemon-species/999'))
+        wp.remember_failure(URL, 404, 'HTTP 404')  # Failed again during this refresh
+        self.assertTrue(wp.is_known_missing('pokemon-species/999'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,75 @@
+import os
+import tempfile
+import unittest
+
+import pandas as pd
+
+import WorthyPokemons as wp
+
+
+def make_entry(pokemon_id, name, dex, types, stats, legendary=False, mythical=False, is_form=False):
+    entry = {
+        'id': pokemon_id,
+        'name': name,
+        'dex': dex,
+        'type1': types[0],
+        'type2': types[1] if len(types) > 1 else '',
+        'legendary': legendary,
+        'mythical': mythical,
+        'is_form': is_form,
+        'species_known': True,
+    }
+    entry.update(zip(wp.STAT_COLUMNS, stats))
+    return entry
+
+
+ROSTER_ENTRIES = [
+    make_entry(6, 'charizard', 6, ['fire', 'flying'], [78, 84, 78, 109, 85, 100]),
+    make_entry(10034, 'charizard-mega-x', 6, ['fire', 'dragon'], [78, 130, 111, 130, 85, 100], is_form=True),
+    make_entry(25, 'pikachu', 25, ['electric'], [35, 55, 40, 50, 50, 90]),
+    make_entry(150, 'mewtwo', 150, ['psychic'], [106, 110, 90, 154, 90, 130], legendary=True),
+    make_entry(151, 'mew', 151, ['psychic'], [100] * 6, mythical=True),
+    make_entry(1018, 'archaludon', 1018, ['steel', 'dragon'], [90, 105, 130, 125, 65, 85]),
+]
+
+
+class RosterSnapshotTest(unittest.TestCase):
+    def setUp(self):
+        self.cwd = os.getcwd()
+        self.temp_dir = tempfile.TemporaryDirectory()
+        os.chdir(self.temp_dir.name)
+
+    def tearDown(self):
+        os.chdir(self.cwd)
+        self.temp_dir.cleanup()
+
+    def test_round_trip(self):
+        roster = wp.make_roster_table(ROSTER_ENTRIES)
+        wp.save_roster_snapshot(roster, True, ['fingerprint', 1])
+        loaded = wp.load_roster_snapshot(True, ['fingerprint', 1])
+        pd.testing.assert_frame_equal(loaded[wp.ROSTER_TABLE_COLUMNS], roster, check_dtype=False)
+
+    def test_empty_roster(self):
+        roster = wp.make_roster_table([])
+        wp.save_roster_snapshot(roster, False, [])
+        self.assertEqual(len(wp.load_roster_snapshot(False, [])), 0)
+
+    def test_stale_fingerprint(self):
+        wp.save_roster_snapshot(wp.make_roster_table(ROSTER_ENTRIES), True, ['old'])
+        self.assertIsNone(wp.load_roster_snapshot(True, ['new']))
+
+    def test_forms_required(self):
+        roster = wp.make_roster_table(ROSTER_ENTRIES)
+        wp.save_roster_snapshot(roster, False, [])
+        self.assertIsNone(wp.load_roster_snapshot(True, []))
+        self.assertEqual(len(wp.load_roster_snapshot(False, [])), len(roster))
+
+    def test_missing_or_foreign_file(self):
+        self.assertIsNone(wp.load_roster_snapshot(False, []))
+        with open(wp.ROSTER_SNAPSHOT, 'wb') as file:
+            file.write(b'not a snapshot')
+        self.assertIsNone(wp.load_roster_snapshot(False, []))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,64 @@
+import os
+import sqlite3
+import tempfile
+import unittest
+
+import WorthyPokemons as wp
+
+ENTRIES = {
+    'pokemon/6': {'id': 6, 'name': 'charizard'},
+    'pokemon/25': {'id': 25, 'name': 'pikachu'},
+    'pokemon/10034': {'id': 10034, 'name': 'charizard-mega-x'},
+}
+
+
+class SQLiteCacheStoreTest(unittest.TestCase):
+    def setUp(self):
+        self.cwd = os.getcwd()
+        self.temp_dir = tempfile.TemporaryDirectory()
+        os.chdir(self.temp_dir.name)
+        self.filename = os.path.abspath(wp.SQLITE_CACHE)
+
+    def tearDown(self):
+        for filename in list(wp._sqlite_connections):
+            connection, _ = wp._sqlite_connections.pop(filename)
+            connection.close()
+        os.chdir(self.cwd)
+        self.temp_dir.cleanup()
+
+    def open_store(self, import_from=None):
+        return wp.SQLiteCacheStore(self.filename, 'pokemon_details', 'pokemon', import_from=import_from)
+
+    def reopen_store(self):
+        connection, _ = wp._sqlite_connections.pop(self.filename)
+        connection.close()
+        return self.open_store()
+
+    def test_round_trip(self):
+        cache = self.open_store()
+        for key, value in ENTRIES.items():
+            cache[key] = value
+        cache.flush()
+        del cache['pokemon/25']
+        cache = self.reopen_store()
+        self.assertEqual(dict(cache.items()), {key: value for key, value in ENTRIES.items() if key != 'pokemon/25'})
+
+    def test_writes_do_not_hold_the_lock(self):
+        cache = self.open_store()
+        cache['pokemon/6'] = ENTRIES['pokemon/6']  # Not flushed
+        other = sqlite3.connect(self.filename, timeout=0.1)
+        other.execute("INSERT INTO pokemon_details VALUES ('pokemon/25', '{}')")
+        other.commit()
+        other.close()
+        self.assertIn('pokemon/25', cache)
+
+    def test_imports_json(self):
+        json_cache = wp.JSONCacheStore(wp.POKEMON_DETAILS_CACHE, 'pokemon')
+        for key, value in ENTRIES.items():
+            json_cache[key] = value
+        json_cache.flush()
+        self.assertEqual(dict(self.open_store(import_from=wp.POKEMON_DETAILS_CACHE).items()), ENTRIES)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,110 @@
+import json
+import os
+import unittest
+
+import numpy as np
+
+import WorthyPokemons as wp
+
+TYPE_CHART = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'type_chart.json')
+
+
+def calculate_defensive_effectiveness_by_sets(pokemon_types, type_chart):
+    """The set-based count the type matrix replaced, kept as the reference it must agree with."""
+    immunities = set()
+    quarter_damage = set()
+    half_damage = set()
+    for poke_type in pokemon_types:
+        relations = type_chart[poke_type]
+        for immunity in relations['no_damage_from']:
+            immunities.add(immunity['name'])
+        for resistance in relations['half_damage_from']:
+            resistance_type = resistance['name']
+            if resistance_type in immunities or resistance_type in quarter_damage:
+                continue
+            elif resistance_type in half_damage:
+                quarter_damage.add(resistance_type)
+                half_damage.remove(resistance_type)
+            else:
+                half_damage.add(resistance_type)
+    return len(immunities) + len(quarter_damage) + len(half_damage)
+
+
+class TypeScoringTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        with open(TYPE_CHART) as file:
+            cls.type_chart = json.load(file)
+        cls.type_names, cls.type_matrix = wp.build_type_matrix(cls.type_chart)
+        cls.type_codes = {type_name: code for code, type_name in enumerate(cls.type_names)}
+
+    def codes(self, *typings):
+        return np.array([[self.type_codes[typing[0]], self.type_codes[typing[1]] if len(typing) > 1 else -1]
+                         for typing in typings])
+
+    def test_matrix(self):
+        self.assertEqual(len(self.type_names), 18)
+        self.assertNotIn('stellar', self.type_names)
+        multiplier = lambda attacking, defending: self.type_matrix[self.type_codes[attacking], self.type_codes[defending]]
+        self.assertEqual(multiplier('water', 'fire'), 2)
+        self.assertEqual(multiplier('fire', 'water'), 0.5)
+        self.assertEqual(multiplier('normal', 'ghost'), 0)
+        self.assertEqual(multiplier('normal', 'normal'), 1)
+
+    def test_legacy_count_matches_the_set_based_count(self):
+        # Every single type and every dual typing in both orders: 18 + 18 * 17 = 324
+        typings = [(first, second) if first != second else (first,)
+                   for first in self.type_names for second in self.type_names]
+        self.assertEqual(len(typings), 324)
+        scores = wp.calculate_defensive_effectiveness(self.codes(*typings), self.type_matrix)
+        expected = [calculate_defensive_effectiveness_by_sets(typing, self.type_chart) for typing in typings]
+        self.assertEqual(scores.tolist(), expected)
+
+    def test_legacy_count(self):
+        scores = wp.calculate_defensive_effectiveness(self.codes(('steel', 'dragon'), ('normal',)), self.type_matrix)
+        self.assertEqual(scores.tolist(), [14, 1])
+
+    def test_typing_table(self):
+        table, typing_index = wp.build_typing_table(self.type_names, self.type_matrix)
+        self.assertEqual(len(table), 171)
+        np.testing.assert_array_equal(typing_index, typing_index.T)
+        steel_dragon = table.iloc[typing_index[self.type_codes['steel'], self.type_codes['dragon']]]
+        self.assertEqual({steel_dragon['type1'], steel_dragon['type2']}, {'steel', 'dragon'})
+        self.assertEqual(steel_dragon['from_poison'], 0)
+        self.assertEqual(steel_dragon['from_grass'], 0.25)
+        self.assertEqual(steel_dragon['from_ground'], 2)
+        counts = ['immunities', 'resistances_4x', 'resistances_2x', 'weaknesses_2x', 'weaknesses_4x']
+        self.assertEqual(steel_dragon[counts].tolist(), [1, 1, 8, 2, 0])
+        self.assertEqual(steel_dragon['defensive_advantages'], 14)
+
+    def test_legacy_scores_follow_the_type_order(self):
+        table, typing_index = wp.build_typing_table(self.type_names, self.type_matrix)
+        # Every typing in both orders, scored from the table, matches the direct count
+        typings = [(first, second) if first != second else (first,)
+                   for first in self.type_names for second in self.type_names]
+        type_codes = self.codes(*typings)
+        scores = wp.score_defenses(type_codes, table, typing_index, 'legacy')
+        np.testing.assert_array_equal(scores['defensive_advantages'],
+                                      wp.calculate_defensive_effectiveness(type_codes, self.type_matrix))
+
+    def test_multiplier_scores(self):
+        table, typing_index = wp.build_typing_table(self.type_names, self.type_matrix)
+        scores = wp.score_defenses(self.codes(('steel', 'dragon'), ('dragon', 'steel'), ('fire', 'water'), ('normal',)),
+                                   table, typing_index, 'multiplier')
+        self.assertEqual(scores['immunities'].tolist(), [1, 1, 0, 1])
+        self.assertEqual(scores['resistances'].tolist(), [9, 9, 5, 0])
+        self.assertEqual(scores['weaknesses'].tolist(), [2, 2, 3, 1])
+        self.assertEqual(scores['defensive_advantages'].tolist(), [8, 8, 2, 0])
+        # Water and Grass are resisted by one of Fire/Water and hit the other super-effectively, so they cancel
+        legacy = wp.score_defenses(self.codes(('fire', 'water')), table, typing_index, 'legacy')
+        self.assertEqual(legacy['defensive_advantages'].tolist(), [7])
+
+    def test_offense_counts(self):
+        scores = wp.score_offense(self.codes(('steel', 'dragon'), ('dragon', 'steel'), ('normal',)), self.type_matrix)
+        # Steel hits Ice, Rock and Fairy super-effectively and Dragon hits Dragon
+        self.assertEqual(scores['stab_super_effective'].tolist(), [4, 4, 0])
+        self.assertEqual(scores['stab_neutral'].tolist(), [13, 13, 15])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,92 @@
+import random
+import unittest
+
+import WorthyPokemons as wp
+
+TYPES = ['fire', 'water', 'grass', 'dragon', 'steel', 'psychic']
+
+
+def get_pokemon_signature(pokemon):
+    types = sorted(t for t in (pokemon['type1'], pokemon['type2']) if t)
+    return (tuple(types), tuple(int(pokemon[stat]) for stat in wp.STAT_COLUMNS))
+
+
+def get_unique_forms_by_loop(roster, candidates, form_index):
+    """The per-row loop get_unique_forms replaced, kept as the reference it must agree with."""
+    processed_signatures = {}
+    roster_by_name = dict(zip(roster['name'], roster.index))
+    unique = []
+    for index, pokemon in zip(candidates.index, candidates.to_dict('records')):
+        pokemon_signature = get_pokemon_signature(pokemon)
+        base_name = form_index[pokemon['name']]['default']
+        if base_name != pokemon['name'] and base_name in roster_by_name:
+            if get_pokemon_signature(roster.loc[roster_by_name[base_name]]) == pokemon_signature:
+                continue
+        signature_key = (base_name, pokemon_signature)
+        if signature_key in processed_signatures:
+            continue
+        processed_signatures[signature_key] = True
+        unique.append(index)
+    return unique
+
+
+def make_random_roster(rng):
+    """Build a shuffled roster whose forms often repeat their base form or each other, in either type order."""
+    entries = []
+    form_index = {}
+    form_id = 10000
+    for dex in rng.sample(range(1, 1000), rng.randint(1, 30)):
+        base_types = rng.sample(TYPES, rng.randint(1, 2))
+        base_stats = [rng.choice([50, 80, 100]) for _ in wp.STAT_COLUMNS]
+        forms = [(dex, f'species{dex}', base_types, base_stats, False)]
+        for number in range(rng.randint(0, 3)):
+            choice = rng.random()
+            if choice < 0.4:
+                types, stats = rng.choice([base_types, base_types[::-1]]), base_stats
+            elif choice < 0.6:
+                _, _, types, stats, _ = rng.choice(forms)
+                types = types[::-1]
+            else:
+                types = rng.sample(TYPES, rng.randint(1, 2))
+                stats = [rng.choice([50, 80, 100]) for _ in wp.STAT_COLUMNS]
+            form_id += 1
+            forms.append((form_id, f'species{dex}-form{number}', types, stats, True))
+        for pokemon_id, name, types, stats, is_form in forms:
+            entry = {'id': pokemon_id, 'name': name, 'dex': dex, 'type1': types[0],
+                     'type2': types[1] if len(types) > 1 else '', 'legendary': False, 'mythical': False,
+                     'is_form': is_form, 'species_known': True}
+            entry.update(zip(wp.STAT_COLUMNS, stats))
+            entries.append(entry)
+            form_index[name] = {'species': dex, 'species_name': f'species{dex}', 'default': f'species{dex}',
+                                'category': 'other' if is_form else 'default'}
+    rng.shuffle(entries)
+    return wp.make_roster_table(entries), form_index
+
+
+class UniqueFormsTest(unittest.TestCase):
+    def test_matches_the_per_row_loop(self):
+        rng = random.Random(21)
+        for attempt in range(200):
+            roster, form_index = make_random_roster(rng)
+            # Filter like analyze_roster does, so some base forms are missing from the candidates
+            candidates = roster[roster[wp.STAT_COLUMNS].sum(axis=1) >= rng.choice([0, 450, 500])]
+            with self.subTest(attempt=attempt):
+                self.assertEqual(list(wp.get_unique_forms(candidates)),
+                                 get_unique_forms_by_loop(roster, candidates, form_index))
+
+    def test_prefers_the_default_form(self):
+        roster, _ = make_random_roster(random.Random(0))
+        base = roster[~roster['is_form']].iloc[0]
+        duplicate = base.copy()
+        duplicate['name'] += '-duplicate'
+        duplicate['is_form'] = True
+        # Same types in the other order
+        duplicate['type1'], duplicate['type2'] = base['type2'] or base['type1'], base['type2'] and base['type1']
+        roster = wp.make_roster_table([duplicate.to_dict(), *roster.to_dict('records')])
+        unique = wp.get_unique_forms(roster)
+        self.assertNotIn(0, unique)
+        self.assertIn(roster.index[roster['name'] == base['name']][0], unique)
+
+
+if __name__ == '__main__':
+    unittest.main()